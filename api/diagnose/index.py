@@ -83,22 +83,17 @@ class handler(BaseHTTPRequestHandler):
             
             print(f"Running diagnostics for alert: {alert_text[:100]}...")
             
+            if data.get("stream"):
+                self._stream_diagnosis(alert_text)
+                return
+            
             # Run diagnostics
             result = _system.diagnose(alert_text, verbose=False)
             
             print("Diagnostics completed successfully")
             
             # Send success response
-            self._send_json(200, {
-                "parsed": result["parsed"],
-                "rootCause": result["root_cause"],
-                "resolution": result["resolution"],
-                "report": result["report"],
-                "logEvidence": result["log_evidence"],
-                "knowledgeBase": result["kb_articles"],
-                "similarCases": result["similar_cases"],
-                "confidenceAssessment": result.get("confidence_assessment"),
-            })
+            self._send_json(200, self._result_payload(result))
             
         except Exception as exc:
             print(f"ERROR in do_POST: {exc}")
@@ -109,6 +104,51 @@ class handler(BaseHTTPRequestHandler):
                 "traceback": traceback.format_exc()
             })
     
+    def _stream_diagnosis(self, alert_text: str):
+        """
+        Run diagnostics, streaming newline-delimited JSON events.
+        
+        Report markdown is sent as {"reportChunk": ...} lines while it is
+        generated, followed by a final {"result": ...} line with the full payload.
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        
+        def send_event(event: dict):
+            self.wfile.write(json.dumps(event).encode() + b"\n")
+            self.wfile.flush()
+        
+        try:
+            result = _system.diagnose(
+                alert_text,
+                verbose=False,
+                on_report_chunk=lambda chunk: send_event({"reportChunk": chunk}),
+            )
+            print("Diagnostics completed successfully")
+            send_event({"result": self._result_payload(result)})
+        except Exception as exc:
+            # Headers are already sent, so the error goes in the stream
+            print(f"ERROR in _stream_diagnosis: {exc}")
+            traceback.print_exc()
+            send_event({"error": str(exc), "type": type(exc).__name__})
+    
+    @staticmethod
+    def _result_payload(result: dict) -> dict:
+        """Shape a diagnosis result for the front end."""
+        return {
+            "parsed": result["parsed"],
+            "rootCause": result["root_cause"],
+            "resolution": result["resolution"],
+            "report": result["report"],
+            "reportFromCache": result.get("report_from_cache", False),
+            "logEvidence": result["log_evidence"],
+            "knowledgeBase": result["kb_articles"],
+            "similarCases": result["similar_cases"],
+            "confidenceAssessment": result.get("confidence_assessment"),
+        }
+    
     def _send_json(self, status_code: int, data: dict):
         """Helper to send JSON responses"""
         self.send_response(status_code)
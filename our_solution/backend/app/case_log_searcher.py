@@ -6,6 +6,9 @@ import zipfile
 import xml.etree.ElementTree as ET
 from typing import List, Dict
 
+# Context text when nothing matched; also recognised by the confidence scoring
+MISSING_CASES = "No similar past cases found."
+
 
 class CaseLogSearcher:
     """Parse and search historical case log"""
@@ -127,7 +130,7 @@ class CaseLogSearcher:
     def format_cases(self, cases: List[Dict], max_cases: int = 3) -> str:
         """Format cases as readable text"""
         if not cases:
-            return "No similar past cases found."
+            return MISSING_CASES
 
         output = []
         for i, case in enumerate(cases[:max_cases]):
@@ -29,6 +29,26 @@ AZURE_OPENAI_API_VERSION = os.environ.get(
     "2025-01-01-preview",
 )
 DEPLOYMENT_NAME = os.environ.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4.1-nano")
+# Optional embedding deployment (e.g. text-embedding-3-small); enables the
+# semantic cache for near-duplicate alerts when set
+EMBEDDING_DEPLOYMENT_NAME = os.environ.get("AZURE_OPENAI_EMBEDDING_DEPLOYMENT")
+# Optional smaller deployment (e.g. gpt-4o-mini) for alert parsing; defaults to
+# AZURE_OPENAI_DEPLOYMENT when unset
+PARSE_DEPLOYMENT_NAME = os.environ.get("AZURE_OPENAI_PARSE_DEPLOYMENT")
+# Client-side throttling: max in-flight requests and the deployment's RPM quota
+# (leave AZURE_OPENAI_RPM unset to disable pacing)
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("AZURE_OPENAI_MAX_CONCURRENCY", "16"))
+REQUESTS_PER_MINUTE = int(os.environ["AZURE_OPENAI_RPM"]) if os.environ.get("AZURE_OPENAI_RPM") else None
+# Optional SQLite file (e.g. ./cache/gpt_cache.sqlite) that keeps cached GPT
+# responses across restarts; in-memory caching only when unset
+RESPONSE_CACHE_PATH = os.environ.get("AZURE_OPENAI_RESPONSE_CACHE_PATH")
+# Send a prompt_cache_key per system prompt so requests of the same kind are
+# routed to the same prompt cache; off by default since older API versions
+# reject unknown request fields
+PROMPT_CACHE_KEYS = os.environ.get("AZURE_OPENAI_PROMPT_CACHE_KEYS", "").lower() in ("1", "true", "yes")
+# Root cause diagnoses sampled per alert and majority-voted; every sample is
+# billed as output tokens, so a single diagnosis is the default
+ROOT_CAUSE_SAMPLES = int(os.environ.get("AZURE_OPENAI_ROOT_CAUSE_SAMPLES", "1"))
 
 # Paths to data files (relative to backend/app directory)
 DATA_DIR = "../../../Problem Statement 3 - Redefining Level 2 Product Ops copy"
@@ -4,7 +4,9 @@ Orchestrates all components to provide intelligent diagnosis.
 """
 
 import os
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Dict, List, Optional
 
 from .config import (
     LOG_DIR,
@@ -14,12 +16,49 @@ from .config import (
     AZURE_OPENAI_ENDPOINT,
     AZURE_OPENAI_API_VERSION,
     DEPLOYMENT_NAME,
+    EMBEDDING_DEPLOYMENT_NAME,
+    PARSE_DEPLOYMENT_NAME,
+    MAX_CONCURRENT_REQUESTS,
+    REQUESTS_PER_MINUTE,
+    RESPONSE_CACHE_PATH,
+    PROMPT_CACHE_KEYS,
+    ROOT_CAUSE_SAMPLES,
 )
 from .log_searcher import LogSearcher
-from .kb_searcher import KnowledgeBaseSearcher
+from .kb_searcher import KnowledgeBaseSearcher, public_articles
 from .case_log_searcher import CaseLogSearcher
 from .gpt_analyzer import GPTAnalyzer
 
+_shared_analyzer: Optional[GPTAnalyzer] = None
+_shared_analyzer_lock = Lock()
+
+
+def get_gpt_analyzer() -> GPTAnalyzer:
+    """
+    Return the process-wide GPT analyzer, creating it on first use.
+
+    Sharing one analyzer means every diagnostic system uses the same response
+    caches and the same throttle, so the RPM budget is not multiplied by the
+    number of instances.
+    """
+    global _shared_analyzer
+    with _shared_analyzer_lock:
+        if _shared_analyzer is None:
+            _shared_analyzer = GPTAnalyzer(
+                api_key=AZURE_OPENAI_API_KEY,
+                endpoint=AZURE_OPENAI_ENDPOINT,
+                api_version=AZURE_OPENAI_API_VERSION,
+                deployment=DEPLOYMENT_NAME,
+                embedding_deployment=EMBEDDING_DEPLOYMENT_NAME,
+                parse_deployment=PARSE_DEPLOYMENT_NAME,
+                max_concurrency=MAX_CONCURRENT_REQUESTS,
+                requests_per_minute=REQUESTS_PER_MINUTE,
+                response_cache_path=RESPONSE_CACHE_PATH,
+                prompt_cache_keys=PROMPT_CACHE_KEYS,
+                root_cause_samples=ROOT_CAUSE_SAMPLES,
+            )
+        return _shared_analyzer
+
 
 class L2DiagnosticSystem:
     """
@@ -48,21 +87,26 @@ class L2DiagnosticSystem:
         print(f"   ✓ Case Log loaded ({len(self.case_log_searcher.cases)} historical cases)")
 
         # GPT Analyzer
-        self.gpt_analyzer = GPTAnalyzer(
-            api_key=AZURE_OPENAI_API_KEY,
-            endpoint=AZURE_OPENAI_ENDPOINT,
-            api_version=AZURE_OPENAI_API_VERSION,
-            deployment=DEPLOYMENT_NAME,
-        )
+        self.gpt_analyzer = get_gpt_analyzer()
         print("   ✓ Azure OpenAI connected\n")
 
-    def diagnose(self, alert_text: str, verbose: bool = True) -> Dict:
+        # Worker threads for pipeline stages that do not depend on each other
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="l2-diagnose")
+
+    def diagnose(
+        self,
+        alert_text: str,
+        verbose: bool = True,
+        on_report_chunk: Optional[Callable[[str], None]] = None,
+    ) -> Dict:
         """
         Complete diagnostic pipeline for an alert.
 
         Args:
             alert_text: The raw alert text (email/SMS/call)
             verbose: Print progress messages
+            on_report_chunk: Called with each markdown chunk as the report is
+                generated, so callers can forward it before the pipeline finishes
 
         Returns:
             Dict containing all diagnostic information and markdown report
@@ -82,78 +126,23 @@ class L2DiagnosticSystem:
             print(f"   ✓ Entity: {parsed.get('entity_id')}")
             print(f"   ✓ Channel: {parsed.get('channel')}")
 
-        # Step 2: Search Case Log for similar cases (DO THIS EARLY!)
+        # Steps 2-4 only depend on the parsed alert and are independent of each
+        # other, so the case log, application log and KB searches run in parallel
         if verbose:
-            print("\n📚 Step 2: Searching Case Log for similar cases...")
-        similar_cases = []
-        
-        # First try keyword search with symptoms
-        if parsed.get("symptoms"):
-            similar_cases = self.case_log_searcher.find_similar_cases(
-                symptoms=parsed["symptoms"],
-                module=parsed.get("module"),
-            )
-        
-        # If no keyword matches, try error code search
-        if not similar_cases and parsed.get("error_code"):
-            error_cases = self.case_log_searcher.search_by_keywords([parsed["error_code"]])
-            if parsed.get("module"):
-                # Filter by module
-                similar_cases = [case for case in error_cases if parsed["module"].lower() in case.get('module', '').lower()]
-            else:
-                similar_cases = error_cases
-        
-        # If still no matches, try module search as fallback
-        if not similar_cases and parsed.get("module"):
-            module_cases = self.case_log_searcher.search_by_module(parsed["module"])
-            similar_cases = module_cases[:5]  # Limit to top 5 module cases
-        
+            print("\n📚 Steps 2-4: Searching Case Log, application logs and Knowledge Base...")
+        cases_future = self._executor.submit(self._find_similar_cases, parsed)
+        logs_future = self._executor.submit(self._search_logs, parsed)
+        kb_future = self._executor.submit(self._search_kb, parsed)
+        similar_cases = cases_future.result()
+        log_evidence = logs_future.result()
+        kb_articles = kb_future.result()
+
         if verbose:
             print(f"   ✓ Found {len(similar_cases)} similar past cases")
             if similar_cases:
                 print(f"   ✓ Best match: {similar_cases[0].get('relevance_score', 0):.0%} relevance")
             print(f"   DEBUG: similar_cases has {len(similar_cases)} items")
-
-        # Step 3: Search logs (targeted based on case hints if available)
-        if verbose:
-            print("\n📝 Step 3: Searching application logs...")
-        log_evidence = []
-        if parsed.get("entity_id"):
-            log_evidence = self.log_searcher.search_all_logs(parsed["entity_id"])
-
-        if parsed.get("error_code"):
-            error_logs = self.log_searcher.search_all_logs(parsed["error_code"])
-            log_evidence.extend(error_logs)
-
-        if verbose:
             print(f"   ✓ Found {len(log_evidence)} log entries")
-
-        # Step 4: Search Knowledge Base
-        if verbose:
-            print("\n📖 Step 4: Searching Knowledge Base...")
-        kb_articles = []
-        
-        # First try keyword search
-        if parsed.get("symptoms"):
-            kb_articles = self.kb_searcher.search_by_keywords(parsed["symptoms"])
-        
-        # If no keyword matches, try error code search
-        if not kb_articles and parsed.get("error_code"):
-            kb_articles = self.kb_searcher.search_by_keywords([parsed["error_code"]])
-        
-        # If still no matches, try module search
-        if not kb_articles and parsed.get("module"):
-            # Map module names to KB module codes
-            module_mapping = {
-                "Vessel": "VSL",
-                "Container": "CNTR", 
-                "EDI/API": "EDI",
-                "API": "API"
-            }
-            kb_module = module_mapping.get(parsed["module"], parsed["module"])
-            kb_articles = self.kb_searcher.search_by_module(kb_module)
-
-        if verbose:
             print(f"   ✓ Found {len(kb_articles)} relevant KB articles")
             if kb_articles:
                 print(f"   DEBUG: First KB article has relevance_score: {kb_articles[0].get('relevance_score', 'NONE')}")
@@ -166,6 +155,16 @@ class L2DiagnosticSystem:
         case_context = self.case_log_searcher.format_cases(similar_cases)
         kb_context = self.kb_searcher.format_articles(kb_articles)
 
+        # Impact/severity (which may also call GPT) only needs the evidence,
+        # so run it while the root cause analysis is in flight
+        severity_future = self._executor.submit(
+            self.gpt_analyzer.assess_impact_and_severity,
+            parsed,
+            log_evidence,
+            similar_cases,
+            kb_articles,
+        )
+
         root_cause = self.gpt_analyzer.analyze_root_cause(
             alert=alert_text,
             parsed=parsed,
@@ -176,7 +175,6 @@ class L2DiagnosticSystem:
 
         if verbose:
             print("   ✓ Root cause identified")
-            print(f"   ✓ Confidence: {root_cause.get('confidence', 0)}%")
 
         # Step 6: Generate confidence assessment
         if verbose:
@@ -199,6 +197,8 @@ class L2DiagnosticSystem:
             parsed=parsed,
             evidence_summary=root_cause.get("evidence_summary", [])
         )
+        # The evidence-based score sits beside GPT's own confidence, which keeps its meaning
+        root_cause["evidence_confidence"] = confidence_assessment["overall_score"]
 
         if verbose:
             print(f"   ✓ Overall confidence: {confidence_assessment['overall_score']}%")
@@ -214,6 +214,8 @@ class L2DiagnosticSystem:
                 [f"Past solution: {case.get('solution', '')}" for case in similar_cases[:3]]
             )
 
+        impact_assessment, severity_classification = severity_future.result()
+
         enhanced_escalation = self.gpt_analyzer.get_enhanced_escalation_decision(
             parsed=parsed,
             confidence_assessment=confidence_assessment,
@@ -223,6 +225,8 @@ class L2DiagnosticSystem:
             root_cause=root_cause,
             kb_context=kb_context,
             case_solutions=case_solutions,
+            impact_assessment=impact_assessment,
+            severity_classification=severity_classification,
         )
 
         if verbose:
@@ -240,19 +244,38 @@ class L2DiagnosticSystem:
         if verbose:
             print("\n📄 Step 7: Generating diagnostic report...")
 
-        similar_cases_text = self.case_log_searcher.format_cases(similar_cases)
-
-        report = self.gpt_analyzer.generate_report(
-            alert=alert_text,
-            parsed=parsed,
-            log_evidence=log_evidence_text,
-            similar_cases=similar_cases_text,
-            root_cause=root_cause,
-            resolution=enhanced_escalation["escalation_decision"],
-        )
+        best_case_relevance = similar_cases[0].get("relevance_score", 0) if similar_cases else 0
+        resolution = enhanced_escalation["escalation_decision"]
+        report = self.gpt_analyzer.reuse_cached_report(parsed, root_cause, resolution, best_case_relevance)
+        report_from_cache = report is not None
+
+        if report_from_cache:
+            if on_report_chunk:
+                on_report_chunk(report)
+        else:
+            # case_context is the same formatting of similar_cases used in step 5
+            report_args = dict(
+                alert=alert_text,
+                parsed=parsed,
+                log_evidence=log_evidence_text,
+                similar_cases=case_context,
+                root_cause=root_cause,
+                resolution=resolution,
+            )
+            if on_report_chunk:
+                chunks = []
+                for chunk in self.gpt_analyzer.generate_report_stream(**report_args):
+                    on_report_chunk(chunk)
+                    chunks.append(chunk)
+                report = "".join(chunks)
+            else:
+                report = self.gpt_analyzer.generate_report(**report_args)
 
         if verbose:
-            print("   ✓ Report generated\n")
+            if report_from_cache:
+                print("   ✓ Report adapted from a previous matching incident\n")
+            else:
+                print("   ✓ Report generated\n")
 
         # Step 8: Generate polished report using GPT
         if verbose:
@@ -267,10 +290,11 @@ class L2DiagnosticSystem:
             "parsed": parsed,
             "similar_cases": similar_cases[:3],
             "log_evidence": log_evidence,
-            "kb_articles": kb_articles[:3],
+            "kb_articles": public_articles(kb_articles[:3]),
             "root_cause": root_cause,
             "resolution": enhanced_escalation["escalation_decision"],
             "report": report,
+            "report_from_cache": report_from_cache,
             "confidence_assessment": confidence_assessment,
             "impact_assessment": enhanced_escalation["impact_assessment"],
             "severity_classification": enhanced_escalation["severity_classification"],
@@ -279,6 +303,71 @@ class L2DiagnosticSystem:
             "learning_feedback_id": enhanced_escalation["learning_feedback_id"],
         }
 
+    def _find_similar_cases(self, parsed: Dict) -> List[Dict]:
+        """Step 2: Search the Case Log for similar past cases."""
+        similar_cases = []
+        
+        # First try keyword search with symptoms
+        if parsed.get("symptoms"):
+            similar_cases = self.case_log_searcher.find_similar_cases(
+                symptoms=parsed["symptoms"],
+                module=parsed.get("module"),
+            )
+        
+        # If no keyword matches, try error code search
+        if not similar_cases and parsed.get("error_code"):
+            error_cases = self.case_log_searcher.search_by_keywords([parsed["error_code"]])
+            if parsed.get("module"):
+                # Filter by module
+                similar_cases = [case for case in error_cases if parsed["module"].lower() in case.get('module', '').lower()]
+            else:
+                similar_cases = error_cases
+        
+        # If still no matches, try module search as fallback
+        if not similar_cases and parsed.get("module"):
+            module_cases = self.case_log_searcher.search_by_module(parsed["module"])
+            similar_cases = module_cases[:5]  # Limit to top 5 module cases
+
+        return similar_cases
+
+    def _search_logs(self, parsed: Dict) -> List[Dict]:
+        """Step 3: Search application logs for the entity and error code."""
+        log_evidence = []
+        if parsed.get("entity_id"):
+            log_evidence = self.log_searcher.search_all_logs(parsed["entity_id"])
+
+        if parsed.get("error_code"):
+            error_logs = self.log_searcher.search_all_logs(parsed["error_code"])
+            log_evidence.extend(error_logs)
+
+        return log_evidence
+
+    def _search_kb(self, parsed: Dict) -> List[Dict]:
+        """Step 4: Search the Knowledge Base."""
+        kb_articles = []
+        
+        # First try keyword search
+        if parsed.get("symptoms"):
+            kb_articles = self.kb_searcher.search_by_keywords(parsed["symptoms"])
+        
+        # If no keyword matches, try error code search
+        if not kb_articles and parsed.get("error_code"):
+            kb_articles = self.kb_searcher.search_by_keywords([parsed["error_code"]])
+        
+        # If still no matches, try module search
+        if not kb_articles and parsed.get("module"):
+            # Map module names to KB module codes
+            module_mapping = {
+                "Vessel": "VSL",
+                "Container": "CNTR", 
+                "EDI/API": "EDI",
+                "API": "API"
+            }
+            kb_module = module_mapping.get(parsed["module"], parsed["module"])
+            kb_articles = self.kb_searcher.search_by_module(kb_module)
+
+        return kb_articles
+
 def print_report(self, result: Dict):
     """Print the diagnostic report."""
     print("\n" + "=" * 80)
@@ -4,7 +4,8 @@ Combines multiple analysis steps to reduce API call overhead
 """
 
 import os
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 
 from .config import (
     LOG_DIR,
@@ -14,9 +15,10 @@ from .config import (
     AZURE_OPENAI_ENDPOINT,
     AZURE_OPENAI_API_VERSION,
     DEPLOYMENT_NAME,
+    RESPONSE_CACHE_PATH,
 )
 from .log_searcher import LogSearcher
-from .kb_searcher import KnowledgeBaseSearcher
+from .kb_searcher import KnowledgeBaseSearcher, public_articles
 from .case_log_searcher import CaseLogSearcher
 from .gpt_analyzer_optimized import GPTAnalyzerOptimized
 
@@ -53,14 +55,21 @@ class L2DiagnosticSystemOptimized:
             endpoint=AZURE_OPENAI_ENDPOINT,
             api_version=AZURE_OPENAI_API_VERSION,
             deployment=DEPLOYMENT_NAME,
+            response_cache_path=RESPONSE_CACHE_PATH,
         )
         print("   ✓ Azure OpenAI connected (Optimized)\n")
 
+        # Worker threads for the evidence searches, which do not depend on each other
+        self._executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="l2-evidence")
+
     def diagnose(self, alert_text: str, verbose: bool = False) -> Dict:
         """
         Optimized diagnostic pipeline - Faster with fewer GPT calls.
         
-        Optimization: Reduced from 5-7 GPT calls to just 2 GPT calls
+        Optimization: Reduced from 5-7 GPT calls to a single GPT call
+        - Parse + Root Cause + Resolution + Escalation (combined), with the
+          report rendered from the structured answer
+        If that response is incomplete, falls back to 2 GPT calls:
         - Call 1: Parse + Root Cause Analysis (combined)
         - Call 2: Resolution + Escalation Decision (combined)
         
@@ -76,6 +85,42 @@ class L2DiagnosticSystemOptimized:
             print("🔍 STARTING OPTIMIZED DIAGNOSTIC ANALYSIS")
             print("=" * 80)
 
+        evidence = self._gather_evidence(alert_text, verbose)
+
+        # GPT CALL: Parse + Root Cause + Resolution in one request
+        if verbose:
+            print("\n🤖 Step 2: GPT Analysis (Parse + Root Cause + Resolution)...")
+        
+        full_result = self.gpt_analyzer.analyze_full(alert_text=alert_text, **evidence["context"])
+        return self._complete_diagnosis(alert_text, evidence, full_result, verbose)
+
+    def diagnose_batch(self, alert_texts: List[str], verbose: bool = False) -> List[Dict]:
+        """
+        Diagnose several alerts (e.g. a backlog in the queue) with batched GPT calls.
+        
+        Evidence is searched per alert, then up to GPTAnalyzerOptimized's batch
+        limits of alerts share one combined GPT call; alerts the batch misses
+        go through the single-alert path.
+        
+        Returns:
+            Diagnostics in input order, each as returned by diagnose
+        """
+        evidence = [self._gather_evidence(alert_text, verbose) for alert_text in alert_texts]
+        
+        if verbose:
+            print(f"\n🤖 Batched GPT Analysis for {len(alert_texts)} alerts...")
+        
+        full_results = self.gpt_analyzer.analyze_alerts_batch([
+            {"alert_text": alert_text, **alert_evidence["context"]}
+            for alert_text, alert_evidence in zip(alert_texts, evidence)
+        ])
+        return [
+            self._complete_diagnosis(alert_text, alert_evidence, full_result, verbose)
+            for alert_text, alert_evidence, full_result in zip(alert_texts, evidence, full_results)
+        ]
+
+    def _gather_evidence(self, alert_text: str, verbose: bool) -> Dict:
+        """Search cases, KB and logs for an alert (no GPT needed)."""
         # OPTIMIZATION: Search Case Log and KB first (no GPT needed)
         if verbose:
             print("\n📚 Step 1: Quick search for similar cases and KB articles...")
@@ -83,43 +128,83 @@ class L2DiagnosticSystemOptimized:
         # Quick parse to get basic info without GPT
         quick_parse = self._quick_parse(alert_text)
         
-        # Search similar cases
-        similar_cases = []
-        if quick_parse.get("entity_id") or quick_parse.get("error_pattern"):
-            keywords = []
-            if quick_parse.get("entity_id"):
-                keywords.append(quick_parse["entity_id"])
-            if quick_parse.get("error_pattern"):
-                keywords.append(quick_parse["error_pattern"])
-            similar_cases = self.case_log_searcher.search_by_keywords(keywords)[:3]
-        
-        # Search KB articles
-        kb_articles = []
-        if quick_parse.get("module"):
-            module_mapping = {"Vessel": "VSL", "Container": "CNTR", "EDI/API": "EDI/API", "API": "EDI/API"}
-            kb_module = module_mapping.get(quick_parse.get("module"), quick_parse.get("module"))
-            kb_articles = self.kb_searcher.search_by_module(kb_module)[:3]
-        
-        # Search logs
-        log_evidence = []
-        if quick_parse.get("entity_id"):
-            log_evidence = self.log_searcher.search_all_logs(quick_parse["entity_id"])[:5]
+        # The case log, KB and application log searches only depend on the
+        # quick parse, so they run in parallel
+        cases_future = self._executor.submit(self._search_cases, quick_parse)
+        kb_future = self._executor.submit(self._search_kb, quick_parse)
+        logs_future = self._executor.submit(self._search_logs, quick_parse)
+        similar_cases = cases_future.result()
+        kb_articles = kb_future.result()
+        log_evidence = logs_future.result()
         
         if verbose:
             print(f"   ✓ Found {len(similar_cases)} similar cases")
             print(f"   ✓ Found {len(kb_articles)} KB articles")
             print(f"   ✓ Found {len(log_evidence)} log entries")
 
-        # GPT CALL #1: Combined Parse + Root Cause Analysis
-        if verbose:
-            print("\n🤖 Step 2: GPT Analysis (Parse + Root Cause)...")
-        
-        analysis_result = self.gpt_analyzer.analyze_alert_and_root_cause(
-            alert_text=alert_text,
-            log_evidence=self.log_searcher.format_evidence(log_evidence),
-            case_context=self.case_log_searcher.format_cases(similar_cases),
-            kb_context=self.kb_searcher.format_articles(kb_articles),
-        )
+        return {
+            "similar_cases": similar_cases,
+            "kb_articles": kb_articles,
+            "log_evidence": log_evidence,
+            # Evidence text is assembled once and shared by all GPT calls
+            "context": {
+                "log_evidence": self.log_searcher.format_evidence(log_evidence),
+                "case_context": self.case_log_searcher.format_cases(similar_cases),
+                "kb_context": self.kb_searcher.format_articles(kb_articles),
+            },
+        }
+
+    def _search_cases(self, quick_parse: Dict) -> List[Dict]:
+        """Search the Case Log by entity ID and error pattern."""
+        keywords = []
+        if quick_parse.get("entity_id"):
+            keywords.append(quick_parse["entity_id"])
+        if quick_parse.get("error_pattern"):
+            keywords.append(quick_parse["error_pattern"])
+        if not keywords:
+            return []
+        return self.case_log_searcher.search_by_keywords(keywords)[:3]
+
+    def _search_kb(self, quick_parse: Dict) -> List[Dict]:
+        """Search KB articles for the detected module."""
+        if not quick_parse.get("module"):
+            return []
+        module_mapping = {"Vessel": "VSL", "Container": "CNTR", "EDI/API": "EDI/API", "API": "EDI/API"}
+        kb_module = module_mapping.get(quick_parse.get("module"), quick_parse.get("module"))
+        return self.kb_searcher.search_by_module(kb_module)[:3]
+
+    def _search_logs(self, quick_parse: Dict) -> List[Dict]:
+        """Search application logs for the entity ID."""
+        if not quick_parse.get("entity_id"):
+            return []
+        return self.log_searcher.search_all_logs(quick_parse["entity_id"])[:5]
+
+    def _complete_diagnosis(
+        self,
+        alert_text: str,
+        evidence: Dict,
+        full_result: Optional[Dict],
+        verbose: bool,
+    ) -> Dict:
+        """
+        Build the diagnostic result from a combined GPT answer, making the two
+        fallback GPT calls when full_result is None.
+        """
+        similar_cases = evidence["similar_cases"]
+        kb_articles = evidence["kb_articles"]
+        log_evidence = evidence["log_evidence"]
+        context = evidence["context"]
+
+        if full_result is not None:
+            analysis_result = full_result
+        else:
+            # FALLBACK GPT CALL #1: Combined Parse + Root Cause Analysis
+            if verbose:
+                print("   ⚠️  Incomplete response, falling back to separate calls")
+            analysis_result = self.gpt_analyzer.analyze_alert_and_root_cause(
+                alert_text=alert_text,
+                **context,
+            )
         
         parsed = analysis_result["parsed"]
         root_cause = analysis_result["root_cause"]
@@ -141,23 +226,29 @@ class L2DiagnosticSystemOptimized:
         if verbose:
             print(f"\n📊 Step 3: Confidence Assessment: {confidence_assessment['overall_score']}%")
 
-        # GPT CALL #2: Combined Resolution + Escalation + Report
-        if verbose:
-            print("\n💡 Step 4: GPT Resolution (Resolution + Escalation + Report)...")
-        
-        case_solutions = ""
-        if similar_cases:
-            case_solutions = "\n\n".join([f"Past solution: {case.get('solution', '')}" for case in similar_cases[:2]])
-        
-        resolution_result = self.gpt_analyzer.generate_resolution_and_decision(
-            parsed=parsed,
-            root_cause=root_cause,
-            confidence_score=confidence_assessment['overall_score'],
-            kb_context=self.kb_searcher.format_articles(kb_articles),
-            case_solutions=case_solutions,
-            alert_text=alert_text,
-            log_evidence=self.log_searcher.format_evidence(log_evidence),
-        )
+        if full_result is not None:
+            # Escalation follows the evidence-based score, as in fallback call #2
+            resolution_result = self.gpt_analyzer.apply_escalation_policy(
+                full_result, confidence_assessment['overall_score']
+            )
+        else:
+            # FALLBACK GPT CALL #2: Combined Resolution + Escalation
+            if verbose:
+                print("\n💡 Step 4: GPT Resolution (Resolution + Escalation)...")
+            
+            case_solutions = ""
+            if similar_cases:
+                case_solutions = "\n\n".join([f"Past solution: {case.get('solution', '')}" for case in similar_cases[:2]])
+            
+            resolution_result = self.gpt_analyzer.generate_resolution_and_decision(
+                parsed=parsed,
+                root_cause=root_cause,
+                confidence_score=confidence_assessment['overall_score'],
+                kb_context=context["kb_context"],
+                case_solutions=case_solutions,
+                alert_text=alert_text,
+                log_evidence=context["log_evidence"],
+            )
         
         resolution = resolution_result["resolution"]
         report = resolution_result["report"]
@@ -169,7 +260,7 @@ class L2DiagnosticSystemOptimized:
 
         if verbose:
             print("\n" + "=" * 80)
-            print("✅ OPTIMIZED DIAGNOSIS COMPLETE (2 GPT calls)")
+            print(f"✅ OPTIMIZED DIAGNOSIS COMPLETE ({'combined GPT answer' if full_result is not None else '2 fallback GPT calls'})")
             print("=" * 80)
 
         # Quick impact and severity assessment (no GPT)
@@ -180,7 +271,7 @@ class L2DiagnosticSystemOptimized:
             "parsed": parsed,
             "similar_cases": similar_cases,
             "log_evidence": log_evidence,
-            "kb_articles": kb_articles,
+            "kb_articles": public_articles(kb_articles),
             "root_cause": root_cause,
             "resolution": resolution,
             "report": report,
@@ -3,26 +3,491 @@ GPT-powered analysis using Azure OpenAI.
 Enhanced with structured metadata and improved escalation logic.
 """
 
+import copy
 import json
-from typing import Dict, List
+import logging
+import random
+import re
+import time
+from bisect import bisect_right
+from collections import Counter
+from functools import cached_property
+from typing import Dict, Generator, Iterator, List, Optional, Tuple
 
-from openai import AzureOpenAI
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    AzureOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
+from .case_log_searcher import MISSING_CASES
 from .impact_assessor import ImpactAssessor
 from .severity_classifier import SeverityClassifier
 from .justification_engine import JustificationEngine
+from .kb_searcher import MISSING_KB
+from .kb_searcher import has_resolution as article_has_resolution
 from .learning_feedback import LearningFeedback
+from .log_searcher import MISSING_LOGS
+from .openai_client import create_azure_client
+from .prompt_budget import pack_text
+from .rate_limiter import RequestThrottle
+from .response_cache import PersistentResponseCache, ResponseCache, SemanticCache, cache_key
+from .response_schemas import (
+    ESCALATION_DECISION_FORMAT,
+    PARSED_ALERT_FORMAT,
+    PARSED_ALERT_LIST_FORMAT,
+    RESOLUTION_FORMAT,
+    ROOT_CAUSE_FORMAT,
+    ROOT_CAUSE_RESOLUTION_FORMAT,
+    parse_json_object,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying: rate limits, 5xx and network failures (APITimeoutError
+# is a subclass of APIConnectionError)
+_RETRYABLE_ERRORS = (RateLimitError, InternalServerError, APIConnectionError)
+
+# Content returned when a completion request fails. It reads as an empty object
+# for callers that only look up fields; JSON callers treat it as a failure.
+_FAILED_RESPONSE = "{}"
+
+# Score tables as (minimum count, percentage), checked from the highest threshold down.
+_LOG_COUNT_PERCENT = ((5, 100), (3, 75), (1, 50), (0, 25))
+_EVIDENCE_COUNT_PERCENT = ((4, 100), (3, 75), (2, 50), (0, 25))
+
+# Alert wording that marks an incident as customer-reported or urgent
+_CUSTOMER_REPORTED_PATTERN = re.compile(r"customer reported|customer service|urgent|critical", re.IGNORECASE)
+
+# Severities that always escalate, whatever the confidence
+_ESCALATING_SEVERITIES = frozenset(("Critical", "High"))
+
+# Parsed fields that pin down the incident, and values meaning the field is absent
+_IDENTIFIER_KEYS = ("entity_id", "error_code", "module")
+_MISSING_IDENTIFIER_VALUES = (None, "", "Unknown")
+
+# Confidence breakdown entries, in display order
+_BREAKDOWN_COMPONENTS = ("log_evidence", "past_cases", "knowledge_base", "identifiers", "evidence_quality")
+
+# Integer weights (summing to 100) over the breakdown components, in the same
+# order: logs, past cases, KB, identifiers, evidence
+_OVERALL_WEIGHTS = (5, 15, 40, 20, 20)
+_DIAGNOSIS_WEIGHTS = (15, 0, 30, 40, 15)
+_SOLUTION_WEIGHTS = (0, 20, 60, 0, 20)
+
+# Percentage cut-offs for breakdown statuses and confidence levels (bisect lookups)
+_STATUS_THRESHOLDS = (1, 50, 70, 90)
+_STATUS_LABELS = ("none", "limited", "moderate", "good", "excellent")
+_LEVEL_THRESHOLDS = (50, 70)
+_LEVEL_LABELS = ("LOW", "MODERATE", "HIGH")
+
+
+# json.dumps builds a new encoder whenever it gets non-default options, so the
+# prompt encoder is created once. Non-ASCII text stays as-is (fewer tokens than
+# \u escapes).
+_PROMPT_VALUE_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(", ", ": "))
+
+
+def _compact_fields(data: Dict, indent: str = "") -> str:
+    """
+    Render a dict for a prompt as "key: value" lines.
+
+    Avoids the quoted keys, braces and indentation of pretty-printed JSON.
+    Nested dicts become indented blocks; lists, numbers, booleans and None
+    are written as compact JSON so the model still reads them unambiguously.
+    """
+    lines = []
+    for key, value in data.items():
+        if isinstance(value, dict) and value:
+            lines.append(f"{indent}{key}:")
+            lines.append(_compact_fields(value, indent + "  "))
+        elif isinstance(value, str):
+            lines.append(f"{indent}{key}: {value}")
+        else:
+            lines.append(f"{indent}{key}: {_PROMPT_VALUE_ENCODER.encode(value)}")
+    return "\n".join(lines)
+
+
+def _recorded(stream: Generator, chunks: List[str]) -> Generator:
+    """Re-yield a stream's chunks, keeping a copy; returns the stream's return value."""
+    while True:
+        try:
+            chunk = next(stream)
+        except StopIteration as stop:
+            return stop.value
+        chunks.append(chunk)
+        yield chunk
+
+
+def _parse_response(response: str) -> Optional[Dict]:
+    """Parse a JSON completion; None when the request failed or nothing parses."""
+    if response == _FAILED_RESPONSE:
+        return None
+    return parse_json_object(response)
+
+
+def _points_for(count: int, table: Tuple[Tuple[int, int], ...]) -> int:
+    """Return the points of the first (minimum, points) row that count reaches."""
+    return next(points for minimum, points in table if count >= minimum)
+
+
+def _root_cause_category(root_cause: Dict) -> Tuple[str, ...]:
+    """Normalized affected systems, which identify a diagnosis independently of its wording."""
+    systems = root_cause.get("affected_systems") if isinstance(root_cause, dict) else None
+    if not isinstance(systems, list):
+        return ()
+    return tuple(sorted({str(system).strip().lower() for system in systems}))
+
+
+def _count_identifiers(parsed: Dict) -> int:
+    """Count entity ID, error code and module that are present and known in a parsed alert."""
+    return sum(parsed.get(key) not in _MISSING_IDENTIFIER_VALUES for key in _IDENTIFIER_KEYS)
+
+
+def _weighted_score(percentages: Tuple[int, ...], weights: Tuple[int, ...]) -> int:
+    """Weighted 0-100 score, floored, in exact integer arithmetic."""
+    return sum(percentage * weight for percentage, weight in zip(percentages, weights)) // 100
+
+
+def _status_for(percentage: int) -> str:
+    """Map a 0-100 component percentage to its breakdown status."""
+    return _STATUS_LABELS[bisect_right(_STATUS_THRESHOLDS, percentage)]
+
+
+def _level_for(score: float) -> str:
+    """Map a weighted 0-100 score to HIGH / MODERATE / LOW."""
+    return _LEVEL_LABELS[bisect_right(_LEVEL_THRESHOLDS, score)]
+
+
+# Canned interpretation text keyed by (confidence level, evidence band).
+_DIAGNOSIS_EXPLANATIONS = {
+    ("HIGH", "identifiers_and_kb"): "Error code and identifiers clearly defined with matching KB documentation. Diagnosis is highly reliable.",
+    ("HIGH", "kb"): "Knowledge base provides clear documentation of this issue. High confidence in root cause identification.",
+    ("HIGH", "logs_and_evidence"): "Strong log evidence and detailed analysis support the diagnosis.",
+    ("HIGH", "default"): "Multiple evidence sources confirm the diagnosis with high confidence.",
+    ("MODERATE", "kb"): "Related documentation found. Diagnosis is reasonable but may need verification during resolution.",
+    ("MODERATE", "default"): "Some evidence supports diagnosis, but gaps exist. Verify findings during resolution.",
+    ("LOW", "default"): "Limited diagnostic evidence. Root cause identification requires further investigation.",
+}
+
+# Evidence bands per confidence level as (band, minimum percentages), first match
+# wins and "default" applies otherwise. Diagnosis minimums are (identifiers, KB,
+# logs, evidence); solution minimums are (KB, past cases, evidence).
+_DIAGNOSIS_BANDS = {
+    "HIGH": (
+        ("identifiers_and_kb", (100, 85, 0, 0)),
+        ("kb", (0, 85, 0, 0)),
+        ("logs_and_evidence", (0, 0, 75, 75)),
+    ),
+    "MODERATE": (
+        ("kb", (0, 50, 0, 0)),
+    ),
+}
+
+_SOLUTION_BANDS = {
+    "HIGH": (
+        ("kb", (85, 0, 0)),
+        ("kb_and_evidence", (70, 0, 70)),
+        ("cases", (0, 75, 0)),
+    ),
+    "MODERATE": (
+        ("kb", (50, 0, 0)),
+        ("cases", (0, 40, 0)),
+    ),
+}
+
+
+def _select_band(rules: Tuple, percentages: Tuple[int, ...]) -> str:
+    """Return the first band whose minimum percentages are all met."""
+    for band, minimums in rules:
+        if all(value >= minimum for value, minimum in zip(percentages, minimums)):
+            return band
+    return "default"
+
+
+_SOLUTION_EXPLANATIONS = {
+    ("HIGH", "kb"): "Detailed resolution procedure documented in knowledge base with specific steps. Follow documented guidelines carefully.",
+    ("HIGH", "kb_and_evidence"): "Clear resolution guidance available with strong supporting analysis. Solution approach is well-defined.",
+    ("HIGH", "cases"): "Proven solution from similar past cases. Resolution approach has worked before.",
+    ("HIGH", "default"): "Good resolution guidance available from multiple sources.",
+    ("MODERATE", "kb"): "General resolution guidance available. May need adaptation based on specific circumstances. Proceed carefully and verify results.",
+    ("MODERATE", "cases"): "Related solutions found in past cases. Resolution approach adapted from similar scenarios.",
+    ("MODERATE", "default"): "Some resolution guidance available, but may need adaptation. Proceed carefully and verify results.",
+    ("LOW", "default"): "Limited resolution guidance. Consider escalation or consult with senior engineers.",
+}
 
 
 class GPTAnalyzer:
     """Use Azure OpenAI for intelligent analysis."""
 
-    def __init__(self, api_key: str, endpoint: str, api_version: str, deployment: str):
-        self.client = AzureOpenAI(
-            api_key=api_key,
-            api_version=api_version,
-            azure_endpoint=endpoint,
-        )
+    # Maximum number of cached GPT responses and parsed alerts
+    RESPONSE_CACHE_SIZE = 4096
+    PARSE_CACHE_SIZE = 4096
+
+    # Completions up to this temperature are near-deterministic (fixed seed),
+    # so identical prompts reuse the cached answer for RESPONSE_CACHE_TTL
+    RESPONSE_CACHE_MAX_TEMPERATURE = 0.3
+    RESPONSE_CACHE_TTL = 3600  # seconds
+
+    # Estimated-token budgets for reference context in prompts: KB articles in
+    # the root cause / escalation prompts and in the resolution prompt, and the
+    # log evidence in the root cause / report prompts
+    KB_PROMPT_TOKENS = 600
+    RESOLUTION_KB_TOKENS = 1000
+    LOG_PROMPT_TOKENS = 1500
+
+    # Serialized dicts reused across the prompts of a ticket
+    PROMPT_FIELDS_CACHE_SIZE = 256
+
+    # Reports kept for reuse, and the past-case relevance required to reuse one
+    REPORT_CACHE_SIZE = 256
+    REPORT_REUSE_RELEVANCE = 0.9
+
+    # Cosine similarity required to reuse a root cause for a near-duplicate alert
+    SEMANTIC_CACHE_THRESHOLD = 0.92
+    SEMANTIC_CACHE_TTL = 3600  # seconds
+    # Diagnoses kept per module; every lookup scans all of them in Python
+    SEMANTIC_CACHE_SIZE = 128
+
+    # Static context placed first in every system prompt. Azure OpenAI caches
+    # identical prompt prefixes, so everything variable goes in the user message.
+    SYSTEM_PREAMBLE = """You support L2 Product Operations for a port terminal operations system.
+
+SYSTEM CONTEXT:
+- Modules: Container (container records, status and movements), Vessel (vessel schedules, advice and berthing), EDI (EDIFACT messages exchanged with shipping lines, e.g. COARRI, CODECO, BAPLIE, IFTMIN), API (integration services used by partners and the PORTNET portal)
+- Entities: containers (e.g. CMAU0000020), vessels (by name or advice number), EDI messages (by message reference), other
+- Alerts arrive by Email, SMS or Call with priority Low, Medium, High or Critical
+- Escalations go to the owning module team (Container/Vessel/EDI/API) or the Product Team
+
+RESPONSE RULES:
+- Base every conclusion on the alert and evidence provided
+- Write professionally, without mentioning AI or GPT
+"""
+
+    # System prompt for alert parsing
+    PARSE_SYSTEM_PROMPT = SYSTEM_PREAMBLE + """
+TASK: You are a L2 support ticket parser.
+Extract key information from support alerts and return structured JSON.
+
+Return JSON with this exact structure:
+{
+    "ticket_id": "ticket ID from alert (e.g., ALR-861600, INC-154599, TCK-742311)",
+    "channel": "Email/SMS/Call",
+    "module": "Container/Vessel/EDI/API",
+    "priority": "Low/Medium/High/Critical",
+    "entity_type": "container/vessel/message/other",
+    "entity_id": "the specific container number, vessel name, or message reference",
+    "symptoms": ["list of symptoms as brief keywords"],
+    "error_code": "error code if mentioned, otherwise null",
+    "reporter": "who reported this"
+}"""
+
+    # System prompt for parsing several alerts in one call
+    PARSE_MULTI_SYSTEM_PROMPT = SYSTEM_PREAMBLE + """
+TASK: You are a L2 support ticket parser.
+You receive several numbered support alerts. Extract key information from each
+one independently and return structured JSON.
+
+Return JSON with this exact structure, one entry per alert:
+{
+    "alerts": [
+        {
+            "index": "the number of the alert this entry describes",
+            "ticket_id": "ticket ID from alert (e.g., ALR-861600, INC-154599, TCK-742311)",
+            "channel": "Email/SMS/Call",
+            "module": "Container/Vessel/EDI/API",
+            "priority": "Low/Medium/High/Critical",
+            "entity_type": "container/vessel/message/other",
+            "entity_id": "the specific container number, vessel name, or message reference",
+            "symptoms": ["list of symptoms as brief keywords"],
+            "error_code": "error code if mentioned, otherwise null",
+            "reporter": "who reported this"
+        }
+    ]
+}"""
+
+    # System prompt for root cause analysis
+    ROOT_CAUSE_SYSTEM_PROMPT = SYSTEM_PREAMBLE + """
+TASK: You are an expert L2 Product Operations engineer.
+Analyze evidence and determine the root cause of issues in a port terminal system.
+
+Return JSON:
+{
+    "root_cause": "2-3 sentence explanation of what went wrong",
+    "technical_details": "technical explanation of why this happened",
+    "confidence": 0-100,
+    "evidence_summary": ["key pieces of evidence supporting this diagnosis"],
+    "affected_systems": ["which systems/services are impacted"]
+}"""
+
+    # System prompt for resolution steps
+    RESOLUTION_SYSTEM_PROMPT = SYSTEM_PREAMBLE + """
+TASK: You are an L2 support engineer providing actionable resolution steps.
+Use the knowledge base and past case solutions to provide specific, proven solutions.
+
+Return JSON:
+{
+    "resolution_steps": [
+        "Specific action with commands/SQL if applicable",
+        "Next action...",
+        "Continue..."
+    ],
+    "verification_steps": [
+        "How to verify the fix worked"
+    ],
+    "sql_queries": [
+        "Any SQL queries needed (if applicable)"
+    ],
+    "estimated_time": "estimated time to resolve (e.g., '15 minutes')",
+    "time_breakdown": {
+        "resolution_steps_time": "X minutes",
+        "verification_steps_time": "Y minutes", 
+        "sql_commands_time": "Z minutes"
+    },
+    "escalate": true/false,
+    "escalate_to": "Module owner (Container/Vessel/EDI/API) or null",
+    "escalate_reason": "why escalation is or isn't needed"
+}
+
+IMPORTANT: The time breakdown should add up to the total estimated_time. For example:
+- If estimated_time is "20 minutes", then X + Y + Z should equal 20
+- If estimated_time is "45 minutes", then X + Y + Z should equal 45
+- Allocate time realistically based on complexity of each section
+
+NOTE: Write each resolution step as a direct action statement without "Step 1:", "Step 2:" prefixes or special characters like ")"."""
+
+    # System prompt for the combined root cause + resolution call
+    ANALYZE_AND_RESOLVE_SYSTEM_PROMPT = SYSTEM_PREAMBLE + """
+TASK: You are an expert L2 Product Operations engineer.
+Determine the root cause of the issue from the evidence, then provide actionable
+resolution steps, using the knowledge base and past case solutions for specific,
+proven fixes.
+
+Return JSON:
+{
+    "root_cause": {
+        "root_cause": "2-3 sentence explanation of what went wrong",
+        "technical_details": "technical explanation of why this happened",
+        "confidence": 0-100,
+        "evidence_summary": ["key pieces of evidence supporting this diagnosis"],
+        "affected_systems": ["which systems/services are impacted"]
+    },
+    "resolution": {
+        "resolution_steps": ["Specific action with commands/SQL if applicable", "Next action..."],
+        "verification_steps": ["How to verify the fix worked"],
+        "sql_queries": ["Any SQL queries needed (if applicable)"],
+        "estimated_time": "estimated time to resolve (e.g., '15 minutes')",
+        "time_breakdown": {
+            "resolution_steps_time": "X minutes",
+            "verification_steps_time": "Y minutes",
+            "sql_commands_time": "Z minutes"
+        },
+        "escalate": true/false,
+        "escalate_to": "Module owner (Container/Vessel/EDI/API) or null",
+        "escalate_reason": "why escalation is or isn't needed"
+    }
+}
+
+The time breakdown should add up to the total estimated_time.
+Write each resolution step as a direct action statement without "Step 1:" prefixes."""
+
+    # System prompt for the escalation decision
+    ESCALATION_SYSTEM_PROMPT = SYSTEM_PREAMBLE + """
+TASK: You are an experienced duty officer deciding whether to escalate an incident.
+Use the structured metadata and historical patterns to make consistent, auditable decisions.
+Provide professional escalation recommendations without mentioning AI or GPT.
+
+For each incident decide:
+1. Should this be escalated? (Yes/No)
+2. If yes, to which team?
+3. Why?
+
+Provide your reasoning explicitly and return JSON:
+{
+    "escalate": true/false,
+    "escalate_to": "Module owner (Container/Vessel/EDI/API) or null",
+    "escalate_reason": "why escalation is or isn't needed",
+    "estimated_time": "estimated time to resolve",
+    "resolution_steps": ["step1", "step2", "step3"],
+    "verification_steps": ["verify1", "verify2"],
+    "sql_queries": ["query1", "query2"],
+    "risk_assessment": "Low/Medium/High",
+    "confidence_in_decision": "High/Medium/Low"
+}"""
+
+    # System prompt for the diagnostic report
+    REPORT_SYSTEM_PROMPT = SYSTEM_PREAMBLE + """
+TASK: You are generating professional L2 diagnostic reports for port terminal operations.
+Create clear, actionable reports that L2 engineers can use immediately.
+
+Create a well-formatted markdown report with:
+1. Executive Summary (2-3 sentences)
+2. Ticket Information (ID, channel, priority, module)
+3. Root Cause Analysis (with evidence)
+4. Resolution Steps (numbered and actionable)
+5. Verification Checklist
+6. Escalation Guidance (if needed)
+
+Use clear formatting with headers, bullet points, and code blocks where appropriate.
+Make it professional and ready to present to stakeholders."""
+
+    # Alerts sent per completion by parse_alerts_combined
+    PARSE_MULTI_BATCH_SIZE = 10
+
+    # Output token caps per call type; output tokens dominate latency, and the
+    # caps stop a runaway completion long before the model's own limit
+    PARSE_MAX_TOKENS = 300
+    ROOT_CAUSE_MAX_TOKENS = 600
+    RESOLUTION_MAX_TOKENS = 800
+    ESCALATION_MAX_TOKENS = 800
+    REPORT_MAX_TOKENS = 2000
+
+    # Fixed seed so repeated prompts sample consistently
+    COMPLETION_SEED = 42
+
+    # Batch API settings for offline parse backfills
+    BATCH_POLL_INTERVAL = 60  # seconds
+    BATCH_COMPLETION_WINDOW = "24h"
+
+    # Attempts per request on transient failures (429, 5xx, timeouts, dropped
+    # connections), with exponential backoff between them
+    RETRY_ATTEMPTS = 5
+    RETRY_BASE_DELAY = 1.0  # seconds
+    RETRY_MAX_DELAY = 30.0  # seconds
+
+    def __init__(
+        self,
+        api_key: str,
+        endpoint: str,
+        api_version: str,
+        deployment: str,
+        embedding_deployment: Optional[str] = None,
+        parse_deployment: Optional[str] = None,
+        max_concurrency: int = 16,
+        requests_per_minute: Optional[int] = None,
+        client: Optional[AzureOpenAI] = None,
+        response_cache_path: Optional[str] = None,
+        prompt_cache_keys: bool = False,
+        root_cause_samples: int = 1,
+    ):
+        # An injected client (e.g. built once at app startup) is reused as-is;
+        # otherwise the client property builds one on first use. Either way the
+        # SDK's retries are off because _request_completion handles 429 backoff.
+        if client is not None:
+            self.client = client.with_options(max_retries=0)
+        self._client_settings = (api_key, endpoint, api_version)
         self.deployment = deployment
+        # Alert parsing is simple extraction, so it can run on a smaller, cheaper model
+        self.parse_deployment = parse_deployment or deployment
+        # Semantic caching of root causes is only enabled with an embedding deployment
+        self.embedding_deployment = embedding_deployment
+        # Whether requests carry a prompt_cache_key derived from their system prompt
+        self.prompt_cache_keys = prompt_cache_keys
+        # Root cause diagnoses sampled per request (n=) and majority-voted;
+        # one unless configured, since each extra sample is billed
+        self.root_cause_samples = max(1, root_cause_samples)
         
         # Initialize enhanced escalation components
         self.impact_assessor = ImpactAssessor()
@@ -30,95 +495,275 @@ class GPTAnalyzer:
         self.justification_engine = JustificationEngine()
         self.learning_feedback = LearningFeedback()
 
-    def _call_gpt(self, system_prompt: str, user_prompt: str, temperature: float = 0.3) -> str:
-        """Call Azure OpenAI."""
-        try:
-            response = self.client.chat.completions.create(
-                model=self.deployment,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=temperature,
-            )
-            return response.choices[0].message.content
-        except Exception as exc:
-            print(f"Error calling Azure OpenAI: {exc}")
-            return "{}"
+        # Low-temperature completions keyed by the exact prompt
+        self._response_cache = ResponseCache(
+            maxsize=self.RESPONSE_CACHE_SIZE,
+            ttl=self.RESPONSE_CACHE_TTL,
+        )
+        # Optional on-disk tier behind it, so repeat alerts skip Azure after a restart
+        self._persistent_cache = (
+            PersistentResponseCache(response_cache_path, ttl=self.RESPONSE_CACHE_TTL)
+            if response_cache_path else None
+        )
 
-    def _calculate_confidence_score(
+        # parse_alert runs at temperature 0, so re-emitted alerts can reuse the result
+        self._parse_cache = ResponseCache(maxsize=self.PARSE_CACHE_SIZE)
+
+        # parsed / root_cause appear in several prompts per ticket
+        self._prompt_fields_cache = ResponseCache(maxsize=self.PROMPT_FIELDS_CACHE_SIZE)
+
+        # Generated reports keyed by (module, error_code) for near-identical incidents
+        self._report_cache = ResponseCache(maxsize=self.REPORT_CACHE_SIZE)
+
+        # Shared by all request threads so concurrent tickets stay under the quota
+        self._throttle = RequestThrottle(
+            max_concurrency=max_concurrency,
+            requests_per_minute=requests_per_minute,
+        )
+
+        # Root causes for near-duplicate alerts (same module, small entity differences)
+        self._semantic_cache = SemanticCache(
+            threshold=self.SEMANTIC_CACHE_THRESHOLD,
+            ttl=self.SEMANTIC_CACHE_TTL,
+            max_per_namespace=self.SEMANTIC_CACHE_SIZE,
+        )
+
+    @cached_property
+    def client(self) -> AzureOpenAI:
+        """
+        Client on the shared connection pool, built when first needed so
+        processes that never call GPT skip its setup. Threads racing on the
+        first call may each build one; all but one are discarded.
+        """
+        api_key, endpoint, api_version = self._client_settings
+        return create_azure_client(api_key, endpoint, api_version, max_retries=0)
+
+    def _call_gpt(
         self,
-        log_evidence: str,
-        case_context: str,
-        kb_context: str,
-        parsed: Dict,
-        evidence_summary: List[str]
-    ) -> int:
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.3,
+        cache_bypass: bool = False,
+        deployment: Optional[str] = None,
+        response_format: Optional[Dict] = None,
+        max_tokens: Optional[int] = None,
+    ) -> str:
         """
-        Calculate algorithmic confidence score based on evidence quality.
-        
-        Scoring factors:
-        - Log evidence: 0-30 points
-        - Similar cases: 0-25 points
-        - Knowledge base: 0-20 points
-        - Specific identifiers: 0-15 points
-        - Evidence count: 0-10 points
+        Call Azure OpenAI.
         
-        Returns: Confidence score between 0-100
+        Low-temperature calls (up to RESPONSE_CACHE_MAX_TEMPERATURE) are served
+        from an exact-match cache unless cache_bypass is set. deployment
+        overrides the default model; max_tokens caps the completion length.
         """
-        confidence = 0
-        
-        # Factor 1: Log Evidence Quality (0-30 points)
-        if log_evidence and "No relevant logs found" not in log_evidence:
-            log_lines = log_evidence.count('\n')
-            if log_lines >= 5:
-                confidence += 30  # Strong log evidence
-            elif log_lines >= 2:
-                confidence += 20  # Moderate log evidence
-            else:
-                confidence += 10  # Weak log evidence
-        
-        # Factor 2: Similar Past Cases (0-25 points)
-        if case_context and "No similar past cases found" not in case_context:
-            if "Relevance: 100%" in case_context or "Relevance: 9" in case_context:
-                confidence += 25  # Exact match to past case
-            elif "Relevance: 8" in case_context or "Relevance: 7" in case_context:
-                confidence += 20  # Strong similarity
-            elif "Relevance: 6" in case_context or "Relevance: 5" in case_context:
-                confidence += 15  # Moderate similarity
-            else:
-                confidence += 10  # Weak similarity
-        
-        # Factor 3: Knowledge Base Coverage (0-20 points)
-        if kb_context and "No relevant knowledge base articles found" not in kb_context:
-            if "Resolution" in kb_context or "Verification" in kb_context:
-                confidence += 20  # Has documented resolution procedure
-            else:
-                confidence += 10  # Has related KB articles
+        deployment = deployment or self.deployment
+        use_cache = temperature <= self.RESPONSE_CACHE_MAX_TEMPERATURE and not cache_bypass
+        if use_cache:
+            key = cache_key(deployment, system_prompt, user_prompt, temperature, response_format, max_tokens)
+            cached = self._response_cache.get(key)
+            if cached is None and self._persistent_cache is not None:
+                cached = self._persistent_cache.get(key)
+                if cached is not None:
+                    self._response_cache.set(key, cached)
+            if cached is not None:
+                return cached
+
+        options = {"model": deployment}
+        if response_format:
+            options["response_format"] = response_format
+        if max_tokens:
+            options["max_tokens"] = max_tokens
+        content = self._request_completion(system_prompt, user_prompt, temperature, **options)
+        # The failure placeholder must not be cached
+        if use_cache and content and content != _FAILED_RESPONSE:
+            self._response_cache.set(key, content)
+            if self._persistent_cache is not None:
+                self._persistent_cache.set(key, content)
+        return content
+
+    def _call_gpt_samples(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        n: int,
+        response_format: Optional[Dict] = None,
+        max_tokens: Optional[int] = None,
+    ) -> List[str]:
+        """Request n completions of the same prompt in one call (input tokens billed once)."""
+        options = {"response_format": response_format} if response_format else {}
+        if max_tokens:
+            options["max_tokens"] = max_tokens  # Applies to each sample
+        return self._request_completion(system_prompt, user_prompt, temperature, n=n, **options)
+
+    def _request_completion(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        n: int = 1,
+        **options,
+    ):
+        """
+        Send one chat completion request to Azure OpenAI.
         
-        # Factor 4: Specific Identifiers (0-15 points)
-        identifiers_found = 0
-        if parsed.get("entity_id"):
-            identifiers_found += 1
-        if parsed.get("error_code"):
-            identifiers_found += 1
-        if parsed.get("module") and parsed.get("module") != "Unknown":
-            identifiers_found += 1
+        Transient failures are retried with backoff; anything else (bad request,
+        auth) fails fast.
         
-        confidence += min(15, identifiers_found * 5)
+        options are extra create() arguments (e.g. model, response_format).
+        Returns the content string, or a list of contents when n > 1.
+        """
+        request = {
+            "model": self.deployment,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            "temperature": temperature,
+            "seed": self.COMPLETION_SEED,
+            **options,
+        }
+        if n > 1:
+            request["n"] = n
+        request.update(self._prompt_cache_options(system_prompt))
+
+        for attempt in range(self.RETRY_ATTEMPTS):
+            try:
+                with self._throttle:
+                    # Raw response skips building the SDK's pydantic models; only
+                    # the message contents are needed
+                    raw = self.client.chat.completions.with_raw_response.create(**request)
+                body = parse_json_object(raw.text)
+                if not isinstance(body, dict):
+                    logger.error("Azure OpenAI returned an unreadable response body")
+                    break
+                self._log_cached_tokens(body.get("usage"))
+                choices = body["choices"]
+                if n > 1:
+                    return [choice["message"]["content"] for choice in choices]
+                return choices[0]["message"]["content"]
+            except _RETRYABLE_ERRORS as exc:
+                if attempt == self.RETRY_ATTEMPTS - 1:
+                    logger.error("Error calling Azure OpenAI after %d attempts: %s", self.RETRY_ATTEMPTS, exc)
+                    break
+                delay = self._retry_delay(exc, attempt)
+                logger.warning(
+                    "Azure OpenAI %s on attempt %d/%d, retrying in %.1fs",
+                    type(exc).__name__, attempt + 1, self.RETRY_ATTEMPTS, delay,
+                )
+                time.sleep(delay)
+            except Exception as exc:
+                logger.error("Error calling Azure OpenAI: %s", exc)
+                break
+        return [_FAILED_RESPONSE] * n if n > 1 else _FAILED_RESPONSE
+
+    def _prompt_cache_options(self, system_prompt: str) -> Dict:
+        """
+        Extra create() arguments routing requests with the same system prompt
+        to the same Azure prompt cache, or nothing when disabled.
+        """
+        if not self.prompt_cache_keys:
+            return {}
+        # Each call type has a static system prompt, so its hash is a stable key
+        return {"extra_body": {"prompt_cache_key": cache_key(system_prompt)}}
+
+    @staticmethod
+    def _log_cached_tokens(usage: Optional[Dict]):
+        """Report how much of the prompt Azure served from its prompt cache."""
+        details = (usage or {}).get("prompt_tokens_details") or {}
+        cached = details.get("cached_tokens") or 0
+        if cached:
+            logger.debug("Azure OpenAI prompt cache hit: %s/%s prompt tokens", cached, usage.get("prompt_tokens"))
+
+    def _retry_delay(self, exc: Exception, attempt: int) -> float:
+        """Seconds to wait before retrying: Retry-After if given, else jittered backoff."""
+        # Timeouts and connection errors carry no response
+        response = exc.response if isinstance(exc, APIStatusError) else None
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            return min(float(retry_after), self.RETRY_MAX_DELAY)
+        except (TypeError, ValueError):
+            ceiling = min(self.RETRY_MAX_DELAY, self.RETRY_BASE_DELAY * 2 ** attempt)
+            return random.uniform(ceiling / 2, ceiling)
+
+    def _call_gpt_stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.3,
+        max_tokens: Optional[int] = None,
+    ) -> Generator[str, None, Optional[str]]:
+        """
+        Call Azure OpenAI with streaming, yielding content as it arrives.
         
-        # Factor 5: Evidence Summary Quality (0-10 points)
-        if evidence_summary and len(evidence_summary) > 0:
-            evidence_count = len(evidence_summary)
-            if evidence_count >= 4:
-                confidence += 10  # Strong evidence base
-            elif evidence_count >= 2:
-                confidence += 7   # Moderate evidence base
-            else:
-                confidence += 4   # Minimal evidence base
+        Returns the completion's finish_reason ("stop" when the model finished
+        normally), or None when the stream failed part-way.
+        """
+        options = {"max_tokens": max_tokens} if max_tokens else {}
+        finish_reason = None
+        options.update(self._prompt_cache_options(system_prompt))
+        try:
+            # The slot is held until the stream is fully consumed
+            with self._throttle:
+                stream = self.client.chat.completions.create(
+                    model=self.deployment,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                    temperature=temperature,
+                    seed=self.COMPLETION_SEED,
+                    **options,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                for chunk in stream:
+                    if chunk.choices:
+                        choice = chunk.choices[0]
+                        if choice.delta.content:
+                            yield choice.delta.content
+                        if choice.finish_reason:
+                            finish_reason = choice.finish_reason
+                    elif chunk.usage:
+                        # Final chunk carries token usage only
+                        logger.debug("Azure OpenAI stream usage: %s tokens", chunk.usage.total_tokens)
+        except Exception as exc:
+            logger.error("Error streaming from Azure OpenAI: %s", exc)
+            return None
+        return finish_reason
+
+    def _prompt_fields(self, data: Dict) -> str:
+        """
+        Render a dict as compact "key: value" prompt text, reusing earlier results.
         
-        # Ensure confidence is within 0-100 range
-        return min(100, max(0, confidence))
+        repr is C-fast, so it is the cache key; a mutated dict gets a new key.
+        """
+        key = repr(data)
+        serialized = self._prompt_fields_cache.get(key)
+        if serialized is None:
+            serialized = _compact_fields(data)
+            self._prompt_fields_cache.set(key, serialized)
+        return serialized
+
+    def _kb_excerpt(self, kb_context: str) -> str:
+        """KB excerpt shared by the root cause and escalation prompts of a ticket."""
+        return pack_text(kb_context, self.KB_PROMPT_TOKENS) if kb_context else MISSING_KB
+
+    def _log_excerpt(self, log_evidence: str) -> str:
+        """Whole log lines of the evidence that fit the log token budget."""
+        return pack_text(log_evidence, self.LOG_PROMPT_TOKENS, separator="\n") if log_evidence else MISSING_LOGS
+
+    def _embed(self, text: str) -> Optional[List[float]]:
+        """Embed text with the configured embedding deployment."""
+        try:
+            with self._throttle:
+                response = self.client.embeddings.create(
+                    model=self.embedding_deployment,
+                    input=text,
+                )
+            return response.data[0].embedding
+        except Exception as exc:
+            logger.warning("Error creating embedding: %s", exc)
+            return None
 
     def generate_confidence_assessment(
         self,
@@ -133,10 +778,12 @@ class GPTAnalyzer:
         
         Uses actual data objects to calculate accurate confidence percentages.
         """
-        print(f"DEBUG generate_confidence_assessment called:")
-        print(f"  - log_evidence: {len(log_evidence) if log_evidence else 0} items")
-        print(f"  - similar_cases: {len(similar_cases) if similar_cases else 0} items")
-        print(f"  - kb_articles: {len(kb_articles) if kb_articles else 0} items")
+        # Debug logging is off in production; the %-style arguments are only
+        # formatted when it is enabled
+        logger.debug(
+            "generate_confidence_assessment: %d log entries, %d cases, %d KB articles",
+            len(log_evidence or ()), len(similar_cases or ()), len(kb_articles or ()),
+        )
         
         # Calculate individual component percentages
         log_percentage = 0
@@ -147,90 +794,74 @@ class GPTAnalyzer:
         
         # Factor 1: Log Evidence (0-100%)
         if log_evidence and len(log_evidence) > 0:
-            log_count = len(log_evidence)
-            if log_count >= 5:
-                log_percentage = 100  # Excellent
-            elif log_count >= 3:
-                log_percentage = 75   # Good
-            elif log_count >= 1:
-                log_percentage = 50   # Moderate
-            else:
-                log_percentage = 25   # Limited
+            log_percentage = _points_for(len(log_evidence), _LOG_COUNT_PERCENT)
         
         # Factor 2: Similar Past Cases (0-100%)
         if similar_cases and len(similar_cases) > 0:
             # Use the best match's relevance score
             best_relevance = similar_cases[0].get('relevance_score', 0)
-            print(f"  DEBUG: best_relevance for cases = {best_relevance}")
+            logger.debug("best case relevance = %s", best_relevance)
             if best_relevance > 0:
                 case_percentage = int(best_relevance * 100)  # Convert 0.0-1.0 to 0-100%
-                print(f"  DEBUG: case_percentage set to {case_percentage}% (keyword match)")
+                logger.debug("case_percentage = %d%% (keyword match)", case_percentage)
             else:
                 # Fallback case: has cases but no relevance score (module-based search)
                 # GPT is still using these, so give moderate confidence
                 case_percentage = 40
-                print(f"  DEBUG: case_percentage set to 40% (module fallback)")
+                logger.debug("case_percentage = 40%% (module fallback)")
         
         # Factor 3: Knowledge Base (0-100%)
         if kb_articles and len(kb_articles) > 0:
             # Check if this is a keyword match (has relevance_score) or module fallback (no relevance_score)
             best_kb_relevance = kb_articles[0].get('relevance_score', 0)
-            print(f"  DEBUG: best_kb_relevance = {best_kb_relevance}")
             
-            # Check if KB has resolution procedures
-            has_resolution = any('Resolution' in article.get('content', '') or 'Verification' in article.get('content', '') 
-                               for article in kb_articles[:3])
-            print(f"  DEBUG: has_resolution = {has_resolution}")
-            
-            # Check if error code is in KB article title (indicates exact match from error code search)
+            # One pass over the top articles checks whether the KB has resolution
+            # procedures and whether the error code is in an article title
+            # (indicates exact match from error code search); each check stops
+            # scanning once it has matched
+            error_code = parsed.get("error_code")
+            has_resolution = False
             error_code_match = False
-            if parsed.get("error_code"):
-                error_code_match = any(parsed["error_code"] in article.get('title', '') 
-                                     for article in kb_articles[:3])
-            print(f"  DEBUG: error_code_match = {error_code_match}")
+            for article in kb_articles[:3]:
+                if not has_resolution:
+                    has_resolution = article_has_resolution(article)
+                if not error_code_match and error_code:
+                    error_code_match = error_code in article.get('title', '')
+                if has_resolution and error_code_match:
+                    break
+            logger.debug(
+                "best KB relevance = %s, has_resolution = %s, error_code_match = %s",
+                best_kb_relevance, has_resolution, error_code_match,
+            )
             
             if error_code_match and has_resolution:
                 # Perfect match: error code found in KB with resolution procedures
                 kb_percentage = 100
-                print(f"  DEBUG: kb_percentage set to 100% (error code match with resolution)")
+                logger.debug("kb_percentage = 100%% (error code match with resolution)")
             elif error_code_match:
                 # Error code match but no specific resolution
                 kb_percentage = 85
-                print(f"  DEBUG: kb_percentage set to 85% (error code match)")
+                logger.debug("kb_percentage = 85%% (error code match)")
             elif best_kb_relevance > 0:
                 # Keyword match - use actual relevance score
                 kb_percentage = int(best_kb_relevance * 100)
-                print(f"  DEBUG: kb_percentage set to {kb_percentage}% (keyword match)")
+                logger.debug("kb_percentage = %d%% (keyword match)", kb_percentage)
             elif has_resolution:
                 # Module fallback with resolution procedures - still valuable
                 kb_percentage = 70
-                print(f"  DEBUG: kb_percentage set to 70% (module fallback with resolution)")
+                logger.debug("kb_percentage = 70%% (module fallback with resolution)")
             else:
                 # Module fallback without specific resolution - lower confidence
                 kb_percentage = 40
-                print(f"  DEBUG: kb_percentage set to 40% (module fallback without resolution)")
+                logger.debug("kb_percentage = 40%% (module fallback without resolution)")
         
         # Factor 4: Specific Identifiers (0-100%)
-        identifiers_found = 0
-        if parsed.get("entity_id"):
-            identifiers_found += 1
-        if parsed.get("error_code"):
-            identifiers_found += 1
-        if parsed.get("module") and parsed.get("module") != "Unknown":
-            identifiers_found += 1
+        identifiers_found = _count_identifiers(parsed)
         identifier_percentage = int((identifiers_found / 3) * 100) if identifiers_found > 0 else 0
         
         # Factor 5: Evidence Quality (0-100%)
         if evidence_summary and len(evidence_summary) > 0:
-            evidence_count = len(evidence_summary)
-            if evidence_count >= 4:
-                evidence_percentage = 100
-            elif evidence_count >= 3:
-                evidence_percentage = 75
-            elif evidence_count >= 2:
-                evidence_percentage = 50
-            else:
-                evidence_percentage = 25
+            evidence_percentage = _points_for(len(evidence_summary), _EVIDENCE_COUNT_PERCENT)
         
         # Calculate base confidence score (enhanced approach)
         # Original weights optimized for KB-heavy scenarios
@@ -239,13 +870,8 @@ class GPTAnalyzer:
         # Evidence=20% (GPT's analysis quality)
         # Cases=15% (helpful but not essential for documented issues)
         # Logs=5% (nice to have but not required if KB is clear)
-        base_confidence = int(
-            (log_percentage * 0.05) +
-            (case_percentage * 0.15) +
-            (kb_percentage * 0.40) +
-            (identifier_percentage * 0.20) +
-            (evidence_percentage * 0.20)
-        )
+        percentages = (log_percentage, case_percentage, kb_percentage, identifier_percentage, evidence_percentage)
+        base_confidence = _weighted_score(percentages, _OVERALL_WEIGHTS)
         
         # For now, use base confidence as total score
         # Impact and risk will be calculated separately in enhanced escalation logic
@@ -253,12 +879,12 @@ class GPTAnalyzer:
         
         # Generate interpretations
         # Diagnosis confidence: based on identifiers, KB, logs, and evidence
-        diagnosis_score = (identifier_percentage * 0.4) + (kb_percentage * 0.3) + (log_percentage * 0.15) + (evidence_percentage * 0.15)
-        diagnosis_confidence = "HIGH" if diagnosis_score >= 70 else "MODERATE" if diagnosis_score >= 50 else "LOW"
+        diagnosis_score = _weighted_score(percentages, _DIAGNOSIS_WEIGHTS)
+        diagnosis_confidence = _level_for(diagnosis_score)
         
         # Solution confidence: based primarily on KB (especially if has resolution procedures)
-        solution_score = (kb_percentage * 0.6) + (case_percentage * 0.2) + (evidence_percentage * 0.2)
-        solution_confidence = "HIGH" if solution_score >= 70 else "MODERATE" if solution_score >= 50 else "LOW"
+        solution_score = _weighted_score(percentages, _SOLUTION_WEIGHTS)
+        solution_confidence = _level_for(solution_score)
         
         # Determine recommendation
         if total_score >= 70:
@@ -277,26 +903,8 @@ class GPTAnalyzer:
         return {
             "overall_score": total_score,
             "breakdown": {
-                "log_evidence": {
-                    "percentage": log_percentage,
-                    "status": "excellent" if log_percentage >= 90 else "good" if log_percentage >= 70 else "moderate" if log_percentage >= 50 else "limited" if log_percentage > 0 else "none"
-                },
-                "past_cases": {
-                    "percentage": case_percentage,
-                    "status": "excellent" if case_percentage >= 90 else "good" if case_percentage >= 70 else "moderate" if case_percentage >= 50 else "limited" if case_percentage > 0 else "none"
-                },
-                "knowledge_base": {
-                    "percentage": kb_percentage,
-                    "status": "excellent" if kb_percentage >= 90 else "good" if kb_percentage >= 70 else "moderate" if kb_percentage >= 50 else "limited" if kb_percentage > 0 else "none"
-                },
-                "identifiers": {
-                    "percentage": identifier_percentage,
-                    "status": "excellent" if identifier_percentage >= 90 else "good" if identifier_percentage >= 70 else "moderate" if identifier_percentage >= 50 else "limited" if identifier_percentage > 0 else "none"
-                },
-                "evidence_quality": {
-                    "percentage": evidence_percentage,
-                    "status": "excellent" if evidence_percentage >= 90 else "good" if evidence_percentage >= 70 else "moderate" if evidence_percentage >= 50 else "limited" if evidence_percentage > 0 else "none"
-                }
+                component: {"percentage": percentage, "status": _status_for(percentage)}
+                for component, percentage in zip(_BREAKDOWN_COMPONENTS, percentages)
             },
             "interpretation": {
                 "diagnosis_confidence": diagnosis_confidence,
@@ -310,71 +918,54 @@ class GPTAnalyzer:
     
     def _get_diagnosis_explanation(self, confidence_level: str, identifier_percentage: int, kb_percentage: int, log_percentage: int, evidence_percentage: int) -> str:
         """Generate explanation for diagnosis confidence."""
-        if confidence_level == "HIGH":
-            if identifier_percentage == 100 and kb_percentage >= 85:
-                return "Error code and identifiers clearly defined with matching KB documentation. Diagnosis is highly reliable."
-            elif kb_percentage >= 85:
-                return "Knowledge base provides clear documentation of this issue. High confidence in root cause identification."
-            elif log_percentage >= 75 and evidence_percentage >= 75:
-                return "Strong log evidence and detailed analysis support the diagnosis."
-            else:
-                return "Multiple evidence sources confirm the diagnosis with high confidence."
-        elif confidence_level == "MODERATE":
-            if kb_percentage >= 50:
-                return "Related documentation found. Diagnosis is reasonable but may need verification during resolution."
-            return "Some evidence supports diagnosis, but gaps exist. Verify findings during resolution."
-        else:
-            return "Limited diagnostic evidence. Root cause identification requires further investigation."
+        level = confidence_level if confidence_level in _DIAGNOSIS_BANDS else "LOW"
+        band = _select_band(
+            _DIAGNOSIS_BANDS.get(level, ()),
+            (identifier_percentage, kb_percentage, log_percentage, evidence_percentage),
+        )
+        return _DIAGNOSIS_EXPLANATIONS[(level, band)]
     
     def _get_solution_explanation(self, confidence_level: str, kb_percentage: int, case_percentage: int, evidence_percentage: int) -> str:
         """Generate explanation for solution confidence."""
-        if confidence_level == "HIGH":
-            if kb_percentage >= 85:
-                return "Detailed resolution procedure documented in knowledge base with specific steps. Follow documented guidelines carefully."
-            elif kb_percentage >= 70 and evidence_percentage >= 70:
-                return "Clear resolution guidance available with strong supporting analysis. Solution approach is well-defined."
-            elif case_percentage >= 75:
-                return "Proven solution from similar past cases. Resolution approach has worked before."
-            else:
-                return "Good resolution guidance available from multiple sources."
-        elif confidence_level == "MODERATE":
-            if kb_percentage >= 50:
-                return "General resolution guidance available. May need adaptation based on specific circumstances. Proceed carefully and verify results."
-            elif case_percentage >= 40:
-                return "Related solutions found in past cases. Resolution approach adapted from similar scenarios."
-            return "Some resolution guidance available, but may need adaptation. Proceed carefully and verify results."
-        else:
-            return "Limited resolution guidance. Consider escalation or consult with senior engineers."
+        level = confidence_level if confidence_level in _SOLUTION_BANDS else "LOW"
+        band = _select_band(
+            _SOLUTION_BANDS.get(level, ()),
+            (kb_percentage, case_percentage, evidence_percentage),
+        )
+        return _SOLUTION_EXPLANATIONS[(level, band)]
 
-    def parse_alert(self, alert_text: str) -> Dict:
-        """Parse alert and extract key information."""
-        system_prompt = """You are a L2 support ticket parser for a port terminal operations system.
-Extract key information from support alerts and return structured JSON."""
+    @staticmethod
+    def _alert_cache_key(alert_text: str) -> str:
+        """Hash the alert with whitespace collapsed so resent copies share a key."""
+        return cache_key(" ".join(alert_text.split()))
 
-        user_prompt = f"""Parse this support alert and extract key information:
+    def _get_cached_parse(self, key: str) -> Optional[Dict]:
+        """Return a copy of a previously parsed alert, if any."""
+        cached = self._parse_cache.get(key)
+        return copy.deepcopy(cached) if cached is not None else None
 
-ALERT:
-{alert_text}
+    def _store_cached_parse(self, key: str, parsed: Dict):
+        """Remember a parsed alert."""
+        self._parse_cache.set(key, copy.deepcopy(parsed))
 
-Return JSON with this exact structure:
-{{
-    "ticket_id": "ticket ID from alert (e.g., ALR-861600, INC-154599, TCK-742311)",
-    "channel": "Email/SMS/Call",
-    "module": "Container/Vessel/EDI/API",
-    "priority": "Low/Medium/High/Critical",
-    "entity_type": "container/vessel/message/other",
-    "entity_id": "the specific container number, vessel name, or message reference",
-    "symptoms": ["list of symptoms as brief keywords"],
-    "error_code": "error code if mentioned, otherwise null",
-    "reporter": "who reported this"
-}}
-
-Return ONLY valid JSON, no additional text."""
+    def parse_alert(self, alert_text: str) -> Dict:
+        """Parse alert and extract key information."""
+        alert_key = self._alert_cache_key(alert_text)
+        cached = self._get_cached_parse(alert_key)
+        if cached is not None:
+            return cached
 
-        response = self._call_gpt(system_prompt, user_prompt, temperature=0)
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
+        system_prompt, user_prompt = self._build_parse_prompts(alert_text)
+        response = self._call_gpt(
+            system_prompt,
+            user_prompt,
+            temperature=0,
+            deployment=self.parse_deployment,
+            response_format=PARSED_ALERT_FORMAT,
+            max_tokens=self.PARSE_MAX_TOKENS,
+        )
+        parsed = _parse_response(response)
+        if parsed is None:
             return {
                 "ticket_id": "UNKNOWN",
                 "channel": "Email",
@@ -387,89 +978,286 @@ Return ONLY valid JSON, no additional text."""
                 "reporter": "Unknown",
             }
 
-    def analyze_root_cause(
+        # Only cache real answers, not the fallback for a failed call
+        if parsed:
+            self._store_cached_parse(alert_key, parsed)
+        return parsed
+
+    def parse_alerts_combined(self, alerts: List[str]) -> List[Dict]:
+        """
+        Parse several alerts with one chat completion per PARSE_MULTI_BATCH_SIZE.
+        
+        For interactive bulk intake (e.g. the queue at shift start): the system
+        prompt and round trip are paid once per group instead of once per alert.
+        Alerts already in the parse cache are not re-sent, and any alert missing
+        from the combined answer falls back to parse_alert. For large offline
+        backfills, use parse_alert_batch (Batch API) instead.
+        
+        Returns: Parsed alerts in input order
+        """
+        results: List[Optional[Dict]] = [None] * len(alerts)
+        pending = []
+        for index, alert_text in enumerate(alerts):
+            cached = self._get_cached_parse(self._alert_cache_key(alert_text))
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append(index)
+
+        for start in range(0, len(pending), self.PARSE_MULTI_BATCH_SIZE):
+            group = pending[start:start + self.PARSE_MULTI_BATCH_SIZE]
+            user_prompt = "Parse each of these support alerts and extract key information:\n\n" + "\n\n".join(
+                f"ALERT {number}:\n{alerts[index]}" for number, index in enumerate(group)
+            )
+            response = self._call_gpt(
+                self.PARSE_MULTI_SYSTEM_PROMPT,
+                user_prompt,
+                temperature=0,
+                deployment=self.parse_deployment,
+                response_format=PARSED_ALERT_LIST_FORMAT,
+                max_tokens=self.PARSE_MAX_TOKENS * len(group),
+            )
+            entries = (_parse_response(response) or {}).get("alerts")
+            for entry in entries if isinstance(entries, list) else []:
+                number = entry.pop("index", None) if isinstance(entry, dict) else None
+                if isinstance(number, int) and 0 <= number < len(group) and entry:
+                    index = group[number]
+                    results[index] = entry
+                    self._store_cached_parse(self._alert_cache_key(alerts[index]), entry)
+
+        # Alerts the combined call missed are parsed one at a time
+        return [
+            parsed if parsed is not None else self.parse_alert(alert_text)
+            for parsed, alert_text in zip(results, alerts)
+        ]
+
+    def _build_parse_prompts(self, alert_text: str) -> Tuple[str, str]:
+        """Build the (system, user) prompts for alert parsing."""
+        system_prompt = self.PARSE_SYSTEM_PROMPT
+
+        user_prompt = f"""Parse this support alert and extract key information:
+
+ALERT:
+{alert_text}"""
+
+        return system_prompt, user_prompt
+
+    def parse_alerts_batch_job(
+        self,
+        alerts: List[str],
+        batch_deployment: Optional[str] = None,
+        poll_interval: Optional[int] = None,
+    ) -> Dict[str, Dict]:
+        """
+        Parse many alerts offline through the Azure OpenAI Batch API.
+        
+        Intended for nightly backfills of archived alerts, not the interactive
+        path: the job can take up to 24h but is billed at the batch rate and is
+        not bound by the per-minute request quota. Results also warm the parse
+        cache.
+        
+        Returns: Parsed alerts keyed by ticket ID (or "alert-<index>" when the
+        model could not find one)
+        """
+        if poll_interval is None:
+            poll_interval = self.BATCH_POLL_INTERVAL
+
+        lines = []
+        for index, alert_text in enumerate(alerts):
+            system_prompt, user_prompt = self._build_parse_prompts(alert_text)
+            lines.append(json.dumps({
+                "custom_id": f"alert-{index}",
+                "method": "POST",
+                "url": "/chat/completions",
+                "body": {
+                    "model": batch_deployment or self.parse_deployment,
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                    "temperature": 0,
+                    "response_format": PARSED_ALERT_FORMAT,
+                    "max_tokens": self.PARSE_MAX_TOKENS,
+                },
+            }))
+
+        try:
+            batch_file = self.client.files.create(
+                file=("parse_alerts.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch",
+            )
+            batch = self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/chat/completions",
+                completion_window=self.BATCH_COMPLETION_WINDOW,
+            )
+            logger.info("Submitted parse batch %s with %d alerts", batch.id, len(alerts))
+
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                time.sleep(poll_interval)
+                batch = self.client.batches.retrieve(batch.id)
+
+            if batch.status != "completed" or not batch.output_file_id:
+                logger.warning("Parse batch %s ended with status %s", batch.id, batch.status)
+                return {}
+
+            output = self.client.files.content(batch.output_file_id).text
+        except Exception as exc:
+            logger.error("Error running Azure OpenAI batch: %s", exc)
+            return {}
+
+        results = {}
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            # A malformed line fails only its own alert, which parse_alert_batch
+            # then parses synchronously
+            record = parse_json_object(line)
+            custom_id = record.get("custom_id", "") if isinstance(record, dict) else ""
+            try:
+                content = record["response"]["body"]["choices"][0]["message"]["content"]
+                parsed = parse_json_object(content)
+                index = int(custom_id.rsplit("-", 1)[1])
+            except (KeyError, IndexError, TypeError, ValueError):
+                logger.warning("Skipping unparseable batch result %s", custom_id or line[:80])
+                continue
+
+            if isinstance(parsed, dict) and parsed and 0 <= index < len(alerts):
+                self._store_cached_parse(self._alert_cache_key(alerts[index]), parsed)
+                results[parsed.get("ticket_id") or custom_id] = parsed
+
+        return results
+
+    def parse_alert_batch(self, alerts: List[str], batch_deployment: Optional[str] = None) -> List[Dict]:
+        """
+        Parse a backlog of alerts via the Batch API, in input order.
+        
+        The batch job warms the parse cache, so each alert is then read back
+        through parse_alert; any alert the batch could not parse falls back to
+        a regular synchronous call.
+        """
+        self.parse_alerts_batch_job(alerts, batch_deployment=batch_deployment)
+        return [self.parse_alert(alert_text) for alert_text in alerts]
+
+    def _build_root_cause_prompts(
         self,
         alert: str,
         parsed: Dict,
         log_evidence: str,
         case_context: str,
         kb_context: str,
-    ) -> Dict:
-        """Analyze root cause from evidence."""
-        system_prompt = """You are an expert L2 Product Operations engineer.
-Analyze evidence and determine the root cause of issues in a port terminal system."""
+    ) -> Tuple[str, str]:
+        """Build the (system, user) prompts for root cause analysis."""
+        system_prompt = self.ROOT_CAUSE_SYSTEM_PROMPT
 
+        # Reference material shared across tickets goes first and per-ticket data
+        # last, so related tickets share a longer cacheable prompt prefix
         user_prompt = f"""Analyze this support ticket and determine the root cause.
 
+KNOWLEDGE BASE CONTEXT:
+{self._kb_excerpt(kb_context)}
+
+SIMILAR PAST CASES:
+{case_context if case_context else MISSING_CASES}
+
 ORIGINAL ALERT:
 {alert}
 
 PARSED INFO:
-{json.dumps(parsed, indent=2)}
+{self._prompt_fields(parsed)}
 
 LOG EVIDENCE:
-{log_evidence if log_evidence else "No relevant logs found"}
+{self._log_excerpt(log_evidence)}
 
-SIMILAR PAST CASES:
-{case_context if case_context else "No similar cases found"}
+Based on the evidence, provide analysis."""
 
-KNOWLEDGE BASE CONTEXT:
-{kb_context[:2000] if kb_context else "No KB context"}
+        return system_prompt, user_prompt
 
-Based on the evidence, provide analysis:
+    def analyze_root_cause(
+        self,
+        alert: str,
+        parsed: Dict,
+        log_evidence: str,
+        case_context: str,
+        kb_context: str,
+    ) -> Dict:
+        """
+        Analyze root cause from evidence.
+        
+        When an embedding deployment is configured, near-duplicate alerts in the
+        same module reuse a recent diagnosis instead of calling GPT again. The
+        diagnosis carries the model's own confidence; the evidence-based score
+        comes from generate_confidence_assessment.
+        """
+        module = parsed.get("module") or "Unknown"
+        embedding = None
+        result = None
+        if self.embedding_deployment:
+            embedding = self._embed(f"{module} {parsed.get('error_code') or ''}\n{alert}")
+            if embedding:
+                cached = self._semantic_cache.get(module, embedding)
+                if cached is not None:
+                    result = copy.deepcopy(cached)
 
-Return JSON:
-{{
-    "root_cause": "2-3 sentence explanation of what went wrong",
-    "technical_details": "technical explanation of why this happened",
-    "confidence": 0-100,
-    "evidence_summary": ["key pieces of evidence supporting this diagnosis"],
-    "affected_systems": ["which systems/services are impacted"]
-}}
+        if result is None:
+            system_prompt, user_prompt = self._build_root_cause_prompts(
+                alert, parsed, log_evidence, case_context, kb_context
+            )
+            if self.root_cause_samples > 1:
+                responses = self._call_gpt_samples(
+                    system_prompt,
+                    user_prompt,
+                    temperature=0.3,
+                    n=self.root_cause_samples,
+                    response_format=ROOT_CAUSE_FORMAT,
+                    max_tokens=self.ROOT_CAUSE_MAX_TOKENS,
+                )
+            else:
+                responses = [self._call_gpt(
+                    system_prompt,
+                    user_prompt,
+                    temperature=0.3,
+                    response_format=ROOT_CAUSE_FORMAT,
+                    max_tokens=self.ROOT_CAUSE_MAX_TOKENS,
+                )]
+            samples = [sample for sample in map(_parse_response, responses) if sample is not None]
+            if not samples:
+                return self._failed_root_cause()
+            result = self._vote_root_cause(samples)
 
-Return ONLY valid JSON."""
+            if result and embedding:
+                self._semantic_cache.set(module, embedding, copy.deepcopy(result))
 
-        response = self._call_gpt(system_prompt, user_prompt, temperature=0.3)
-        try:
-            result = json.loads(response)
-            # Replace GPT's subjective confidence with algorithmic calculation
-            algorithmic_confidence = self._calculate_confidence_score(
-                log_evidence=log_evidence,
-                case_context=case_context,
-                kb_context=kb_context,
-                parsed=parsed,
-                evidence_summary=result.get("evidence_summary", [])
-            )
-            result["confidence"] = algorithmic_confidence
-            return result
-        except json.JSONDecodeError:
-            return {
-                "root_cause": "Unable to determine",
-                "technical_details": "Analysis failed",
-                "confidence": 0,
-                "evidence_summary": [],
-                "affected_systems": [],
-            }
+        return result
 
-    def get_enhanced_escalation_decision(
+    @staticmethod
+    def _vote_root_cause(samples: List[Dict]) -> Dict:
+        """
+        Pick the majority diagnosis among sampled root causes.
+        
+        Samples agree when they name the same affected systems; the first sample
+        of the largest group wins, so ties keep the first sample.
+        """
+        keys = [_root_cause_category(sample) for sample in samples]
+        winner, _ = Counter(keys).most_common(1)[0]
+        return samples[keys.index(winner)]
+
+    def assess_impact_and_severity(
         self,
         parsed: Dict,
-        confidence_assessment: Dict,
         log_evidence: List[Dict],
         similar_cases: List[Dict],
         kb_articles: List[Dict],
-        root_cause: Dict,
-        kb_context: str,
-        case_solutions: str,
-    ) -> Dict:
+    ) -> Tuple[Dict, Dict]:
         """
-        Enhanced escalation decision using multi-factor analysis.
+        Calculate impact and classify severity.
+        
+        Depends only on the parsed alert and retrieved evidence, not on the root
+        cause, so callers can run it alongside analyze_root_cause.
         
         Returns:
-            Dict with escalation decision, impact assessment, severity, and justification
+            Tuple of (impact_assessment, severity_classification)
         """
-        
-        # Step 1: Calculate Impact Assessment
         impact_assessment = self.impact_assessor.calculate_impact_score(
             parsed_alert=parsed,
             log_evidence=log_evidence,
@@ -477,13 +1265,43 @@ Return ONLY valid JSON."""
             kb_articles=kb_articles
         )
         
-        # Step 2: Classify Severity
         severity_classification = self.severity_classifier.classify_severity(
             parsed_alert=parsed,
             impact_assessment=impact_assessment,
             gpt_analyzer=self
         )
         
+        return impact_assessment, severity_classification
+
+    def get_enhanced_escalation_decision(
+        self,
+        parsed: Dict,
+        confidence_assessment: Dict,
+        log_evidence: List[Dict],
+        similar_cases: List[Dict],
+        kb_articles: List[Dict],
+        root_cause: Dict,
+        kb_context: str,
+        case_solutions: str,
+        impact_assessment: Optional[Dict] = None,
+        severity_classification: Optional[Dict] = None,
+    ) -> Dict:
+        """
+        Enhanced escalation decision using multi-factor analysis.
+        
+        Impact and severity are computed here unless the caller already ran
+        assess_impact_and_severity.
+        
+        Returns:
+            Dict with escalation decision, impact assessment, severity, and justification
+        """
+        
+        # Steps 1-2: Calculate Impact Assessment and Classify Severity
+        if impact_assessment is None or severity_classification is None:
+            impact_assessment, severity_classification = self.assess_impact_and_severity(
+                parsed, log_evidence, similar_cases, kb_articles
+            )
+        
         # Step 3: Generate Structured Metadata for GPT
         structured_metadata = self._generate_structured_metadata(
             parsed, confidence_assessment, impact_assessment, 
@@ -541,76 +1359,120 @@ Return ONLY valid JSON."""
         case_solutions: str,
     ) -> Dict:
         """Get resolution steps based on analysis."""
-        system_prompt = """You are an L2 support engineer providing actionable resolution steps.
-Use the knowledge base and past case solutions to provide specific, proven solutions."""
+        system_prompt = self.RESOLUTION_SYSTEM_PROMPT
 
+        # Shared reference material first, per-ticket data last (prompt caching)
         user_prompt = f"""Based on this diagnosis, provide resolution steps.
 
+KNOWLEDGE BASE (relevant articles):
+{pack_text(kb_context, self.RESOLUTION_KB_TOKENS) if kb_context else MISSING_KB}
+
+PAST CASE SOLUTIONS:
+{case_solutions if case_solutions else "No past solutions found"}
+
 PROBLEM:
-{json.dumps(parsed, indent=2)}
+{self._prompt_fields(parsed)}
 
 ROOT CAUSE:
-{json.dumps(root_cause, indent=2)}
+{self._prompt_fields(root_cause)}
 
-KNOWLEDGE BASE (relevant articles):
-{kb_context[:4000] if kb_context else "No KB context"}
+Provide detailed resolution steps."""
+
+        response = self._call_gpt(
+            system_prompt,
+            user_prompt,
+            temperature=0.2,
+            response_format=RESOLUTION_FORMAT,
+            max_tokens=self.RESOLUTION_MAX_TOKENS,
+        )
+        result = _parse_response(response)
+        if result is None:
+            return self._failed_resolution()
+        return result
+
+    def analyze_and_resolve(
+        self,
+        alert: str,
+        parsed: Dict,
+        log_evidence: str,
+        case_context: str,
+        kb_context: str,
+        case_solutions: str,
+    ) -> Dict:
+        """
+        Diagnose the root cause and propose resolution steps in one GPT call.
+        
+        Equivalent to analyze_root_cause followed by get_resolution_steps, but
+        the evidence is sent once and there is a single round trip. The root
+        cause is a single sample (no majority vote) with the model's own
+        confidence, as in analyze_root_cause.
+        
+        Returns: {"root_cause": {...}, "resolution": {...}}
+        """
+        system_prompt = self.ANALYZE_AND_RESOLVE_SYSTEM_PROMPT
+
+        # Shared reference material first, per-ticket data last (prompt caching)
+        user_prompt = f"""Diagnose this support ticket and provide resolution steps.
+
+KNOWLEDGE BASE CONTEXT:
+{pack_text(kb_context, self.RESOLUTION_KB_TOKENS) if kb_context else MISSING_KB}
+
+SIMILAR PAST CASES:
+{case_context if case_context else MISSING_CASES}
 
 PAST CASE SOLUTIONS:
 {case_solutions if case_solutions else "No past solutions found"}
 
-Provide detailed resolution steps:
+ORIGINAL ALERT:
+{alert}
+
+PARSED INFO:
+{self._prompt_fields(parsed)}
 
-Return JSON:
-{{
-    "resolution_steps": [
-        "Specific action with commands/SQL if applicable",
-        "Next action...",
-        "Continue..."
-    ],
-    "verification_steps": [
-        "How to verify the fix worked"
-    ],
-    "sql_queries": [
-        "Any SQL queries needed (if applicable)"
-    ],
-    "estimated_time": "estimated time to resolve (e.g., '15 minutes')",
-    "time_breakdown": {{
-        "resolution_steps_time": "X minutes",
-        "verification_steps_time": "Y minutes", 
-        "sql_commands_time": "Z minutes"
-    }},
-    "escalate": true/false,
-    "escalate_to": "Module owner (Container/Vessel/EDI/API) or null",
-    "escalate_reason": "why escalation is or isn't needed"
-}}
+LOG EVIDENCE:
+{self._log_excerpt(log_evidence)}"""
 
-IMPORTANT: The time breakdown should add up to the total estimated_time. For example:
-- If estimated_time is "20 minutes", then X + Y + Z should equal 20
-- If estimated_time is "45 minutes", then X + Y + Z should equal 45
-- Allocate time realistically based on complexity of each section
+        response = self._call_gpt(
+            system_prompt,
+            user_prompt,
+            temperature=0.2,
+            response_format=ROOT_CAUSE_RESOLUTION_FORMAT,
+            max_tokens=self.ROOT_CAUSE_MAX_TOKENS + self.RESOLUTION_MAX_TOKENS,
+        )
+        result = _parse_response(response) or {}
+        root_cause = result.get("root_cause") or self._failed_root_cause()
+        resolution = result.get("resolution") or self._failed_resolution()
 
-NOTE: Write each resolution step as a direct action statement without "Step 1:", "Step 2:" prefixes or special characters like ")".
+        return {"root_cause": root_cause, "resolution": resolution}
 
-Return ONLY valid JSON."""
+    @staticmethod
+    def _failed_root_cause() -> Dict:
+        """Root cause returned when GPT gave no usable diagnosis."""
+        return {
+            "root_cause": "Unable to determine",
+            "technical_details": "Analysis failed",
+            "confidence": 0,
+            "evidence_summary": [],
+            "affected_systems": [],
+        }
 
-        response = self._call_gpt(system_prompt, user_prompt, temperature=0.2)
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            return {
-                "resolution_steps": ["Manual investigation required"],
-                "verification_steps": [],
-                "sql_queries": [],
-                "estimated_time": "Unknown",
-                "time_breakdown": {
-                    "resolution_steps_time": "Unknown",
-                    "verification_steps_time": "Unknown",
-                    "sql_commands_time": "Unknown"
-                },
-                "escalate": True,
-                "escalate_to": "Product Team",
-                "escalate_reason": "Unable to determine resolution automatically",
-            }
+    @staticmethod
+    def _failed_resolution() -> Dict:
+        """Resolution returned when GPT gave no usable steps."""
+        return {
+            "resolution_steps": ["Manual investigation required"],
+            "verification_steps": [],
+            "sql_queries": [],
+            "estimated_time": "Unknown",
+            "time_breakdown": {
+                "resolution_steps_time": "Unknown",
+                "verification_steps_time": "Unknown",
+                "sql_commands_time": "Unknown"
+            },
+            "escalate": True,
+            "escalate_to": "Product Team",
+            "escalate_reason": "Unable to determine resolution automatically",
+        }
 
     def _generate_structured_metadata(
         self,
@@ -632,10 +1494,7 @@ Return ONLY valid JSON."""
         recurrence_rate = len(similar_cases) if similar_cases else 0
         
         # Determine customer reported
-        alert_text = parsed.get("alert_text", "").lower()
-        customer_reported = any(keyword in alert_text for keyword in [
-            "customer reported", "customer service", "urgent", "critical"
-        ])
+        customer_reported = bool(_CUSTOMER_REPORTED_PATTERN.search(parsed.get("alert_text", "")))
         
         return {
             "incident_id": parsed.get("ticket_id", "unknown"),
@@ -664,49 +1523,35 @@ Return ONLY valid JSON."""
     ) -> Dict:
         """Get GPT resolution decision with enhanced structured context."""
         
-        system_prompt = """You are an experienced duty officer deciding whether to escalate an incident.
-        Use the structured metadata and historical patterns to make consistent, auditable decisions.
-        Provide professional escalation recommendations without mentioning AI or GPT."""
+        system_prompt = self.ESCALATION_SYSTEM_PROMPT
         
-        user_prompt = f"""Based on the metadata and historical patterns, decide:
-        1. Should this be escalated? (Yes/No)
-        2. If yes, to which team?
-        3. Why?
-
-        Metadata:
-        {json.dumps(structured_metadata, indent=2)}
-
-        Problem Details:
-        {json.dumps(parsed, indent=2)}
-
-        Root Cause:
-        {json.dumps(root_cause, indent=2)}
+        # Shared reference material first, per-ticket data last (prompt caching)
+        user_prompt = f"""Based on the metadata and historical patterns, decide on escalation for this incident.
 
         Knowledge Base Context:
-        {kb_context[:2000] if kb_context else "No KB context"}
+        {self._kb_excerpt(kb_context)}
 
         Past Case Solutions:
         {case_solutions if case_solutions else "No past solutions found"}
 
-        Provide your reasoning explicitly and return JSON:
-        {{
-            "escalate": true/false,
-            "escalate_to": "Module owner (Container/Vessel/EDI/API) or null",
-            "escalate_reason": "why escalation is or isn't needed",
-            "estimated_time": "estimated time to resolve",
-            "resolution_steps": ["step1", "step2", "step3"],
-            "verification_steps": ["verify1", "verify2"],
-            "sql_queries": ["query1", "query2"],
-            "risk_assessment": "Low/Medium/High",
-            "confidence_in_decision": "High/Medium/Low"
-        }}
-
-        Return ONLY valid JSON."""
-        
-        response = self._call_gpt(system_prompt, user_prompt, temperature=0.2)
-        try:
-            return json.loads(response)
-        except json.JSONDecodeError:
+        Metadata:
+        {self._prompt_fields(structured_metadata)}
+
+        Problem Details:
+        {self._prompt_fields(parsed)}
+
+        Root Cause:
+        {self._prompt_fields(root_cause)}"""
+        
+        response = self._call_gpt(
+            system_prompt,
+            user_prompt,
+            temperature=0.2,
+            response_format=ESCALATION_DECISION_FORMAT,
+            max_tokens=self.ESCALATION_MAX_TOKENS,
+        )
+        result = _parse_response(response)
+        if result is None:
             return {
                 "escalate": True,
                 "escalate_to": "Product Team",
@@ -718,6 +1563,7 @@ Return ONLY valid JSON."""
                 "risk_assessment": "High",
                 "confidence_in_decision": "Low"
             }
+        return result
     
     def _apply_enhanced_escalation_logic(
         self,
@@ -743,7 +1589,7 @@ Return ONLY valid JSON."""
         final_reason = ""
         
         # Rule 1: Critical/High severity with any confidence -> Escalate
-        if severity in ["Critical", "High"]:
+        if severity in _ESCALATING_SEVERITIES:
             final_escalate = True
             final_escalate_to = gpt_escalate_to or "Product Team"
             final_reason = f"{severity} severity requires immediate escalation"
@@ -811,7 +1657,77 @@ Return ONLY valid JSON."""
         
         return final_decision
 
-    def generate_report(
+    def reuse_cached_report(
+        self,
+        parsed: Dict,
+        root_cause: Dict,
+        resolution: Dict,
+        best_case_relevance: float,
+    ) -> Optional[str]:
+        """
+        Adapt a previously generated report instead of generating a new one.
+
+        Only used when the incident closely matches a past case and a report was
+        generated for the same module, error code, root cause category (the
+        affected systems) and escalation decision, so the reused text cannot
+        contradict this ticket's diagnosis or routing. The old ticket and entity
+        identifiers are swapped for the new ones.
+
+        Returns:
+            The adapted report, or None when a full report must be generated
+        """
+        key = self._report_key(parsed, root_cause, resolution)
+        if key is None or best_case_relevance < self.REPORT_REUSE_RELEVANCE:
+            return None
+
+        cached = self._report_cache.get(key)
+        if cached is None:
+            return None
+
+        report = cached["report"]
+        for field in ("ticket_id", "entity_id"):
+            old_value, new_value = cached.get(field), parsed.get(field)
+            if old_value and new_value and old_value != new_value:
+                # Whole identifiers only, so IDs embedded in longer tokens stay put
+                pattern = re.compile(rf"(?<![\w-]){re.escape(old_value)}(?![\w-])")
+                report = pattern.sub(lambda _match: new_value, report)
+        return report
+
+    @staticmethod
+    def _report_key(parsed: Dict, root_cause: Dict, resolution: Dict) -> Optional[str]:
+        """
+        Report cache key from the incident's coarse signature, or None when the
+        ticket has no error code or affected systems to match on.
+        
+        The GPT answers themselves are not part of the key: they vary in wording
+        between tickets, and a byte-identical answer is already served by the
+        response cache.
+        """
+        error_code = parsed.get("error_code")
+        category = _root_cause_category(root_cause)
+        if not error_code or not category:
+            return None
+        return cache_key(
+            parsed.get("module", ""),
+            error_code,
+            category,
+            bool(resolution.get("escalate")),
+            resolution.get("escalate_to") or "",
+        )
+
+    def _store_report(self, parsed: Dict, root_cause: Dict, resolution: Dict, report: str):
+        """Remember a generated report for later reuse."""
+        key = self._report_key(parsed, root_cause, resolution)
+        if key is None or not report or report == _FAILED_RESPONSE:
+            return
+
+        self._report_cache.set(key, {
+            "ticket_id": parsed.get("ticket_id"),
+            "entity_id": parsed.get("entity_id"),
+            "report": report,
+        })
+
+    def _build_report_prompts(
         self,
         alert: str,
         parsed: Dict,
@@ -819,40 +1735,80 @@ Return ONLY valid JSON."""
         similar_cases: str,
         root_cause: Dict,
         resolution: Dict,
-    ) -> str:
-        """Generate polished diagnostic report."""
-        system_prompt = """You are generating professional L2 diagnostic reports for port terminal operations.
-Create clear, actionable reports that L2 engineers can use immediately."""
+    ) -> Tuple[str, str]:
+        """Build the (system, user) prompts for the diagnostic report."""
+        system_prompt = self.REPORT_SYSTEM_PROMPT
 
+        # Shared reference material first, per-ticket data last (prompt caching)
         user_prompt = f"""Generate a complete diagnostic report for this ticket.
 
+SIMILAR PAST CASES:
+{similar_cases if similar_cases else MISSING_CASES}
+
 ORIGINAL ALERT:
 {alert}
 
 PARSED DATA:
-{json.dumps(parsed, indent=2)}
+{self._prompt_fields(parsed)}
 
 LOG EVIDENCE:
-{log_evidence if log_evidence else "No logs found"}
-
-SIMILAR PAST CASES:
-{similar_cases if similar_cases else "No similar cases"}
+{self._log_excerpt(log_evidence)}
 
 ROOT CAUSE ANALYSIS:
-{json.dumps(root_cause, indent=2)}
+{self._prompt_fields(root_cause)}
 
 RESOLUTION:
-{json.dumps(resolution, indent=2)}
+{self._prompt_fields(resolution)}"""
 
-Create a well-formatted markdown report with:
-1. Executive Summary (2-3 sentences)
-2. Ticket Information (ID, channel, priority, module)
-3. Root Cause Analysis (with evidence)
-4. Resolution Steps (numbered and actionable)
-5. Verification Checklist
-6. Escalation Guidance (if needed)
+        return system_prompt, user_prompt
 
-Use clear formatting with headers, bullet points, and code blocks where appropriate.
-Make it professional and ready to present to stakeholders."""
+    def generate_report(
+        self,
+        alert: str,
+        parsed: Dict,
+        log_evidence: str,
+        similar_cases: str,
+        root_cause: Dict,
+        resolution: Dict,
+    ) -> str:
+        """Generate polished diagnostic report."""
+        system_prompt, user_prompt = self._build_report_prompts(
+            alert, parsed, log_evidence, similar_cases, root_cause, resolution
+        )
+
+        report = self._call_gpt(
+            system_prompt, user_prompt, temperature=0.4, max_tokens=self.REPORT_MAX_TOKENS
+        )
+        self._store_report(parsed, root_cause, resolution, report)
+        return report
+
+    def generate_report_stream(
+        self,
+        alert: str,
+        parsed: Dict,
+        log_evidence: str,
+        similar_cases: str,
+        root_cause: Dict,
+        resolution: Dict,
+    ) -> Iterator[str]:
+        """
+        Stream the diagnostic report as markdown chunks.
+        
+        Same prompt as generate_report, but the caller can render or forward
+        the report while it is still being generated. Only reports whose stream
+        finished normally are kept for reuse.
+        """
+        system_prompt, user_prompt = self._build_report_prompts(
+            alert, parsed, log_evidence, similar_cases, root_cause, resolution
+        )
+
+        chunks: List[str] = []
+        finish_reason = yield from _recorded(
+            self._call_gpt_stream(
+                system_prompt, user_prompt, temperature=0.4, max_tokens=self.REPORT_MAX_TOKENS
+            ),
+            chunks,
+        )
 
-        return self._call_gpt(system_prompt, user_prompt, temperature=0.4)
+        if finish_reason == "stop":
+            self._store_report(parsed, root_cause, resolution, "".join(chunks))
@@ -1,28 +1,232 @@
 """
 Optimized GPT Analyzer - Combines multiple GPT calls into fewer calls
-Reduces from 5-7 GPT calls to just 2 GPT calls per diagnosis
+Reduces from 5-7 GPT calls to 1 GPT call per diagnosis (2 as a fallback)
+GPT returns structured fields only; the markdown report is rendered from them
 """
 
-import json
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 
-from openai import AzureOpenAI
+from .openai_client import create_azure_client
+from .prompt_budget import estimate_tokens, pack_text
+from .response_cache import PersistentResponseCache, ResponseCache, cache_key
+from .response_schemas import (
+    ANALYSIS_FORMAT,
+    FULL_ANALYSIS_FORMAT,
+    FULL_ANALYSIS_LIST_FORMAT,
+    RESOLUTION_RESULT_FORMAT,
+    parse_json_object,
+)
+
+
+# Output schema fragments shared by the combined-call system prompts
+_PARSED_SCHEMA = """    "parsed": {
+        "ticket_id": "Extract from alert (e.g., ALR-123, INC-456)",
+        "module": "MUST be one of: Container, Vessel, EDI/API (EDI issues must always be EDI/API, never just EDI)",
+        "entity_id": "Container/Vessel ID or IFT number",
+        "channel": "Email/SMS/Call",
+        "priority": "High/Medium/Low",
+        "symptoms": ["brief", "keywords"],
+        "error_code": "if any"
+    }"""
+
+_ROOT_CAUSE_SCHEMA = """    "root_cause": {
+        "root_cause": "Brief root cause (one sentence)",
+        "technical_details": "Technical explanation",
+        "confidence": 50-100,
+        "evidence_summary": ["Key evidence point 1", "Key evidence point 2"]
+    }"""
+
+_RESOLUTION_SCHEMA = """    "resolution": {
+        "resolution_steps": [
+            "Step 1: Specific action",
+            "Step 2: Next action",
+            "Step 3: Continue..."
+        ],
+        "verification_steps": ["How to verify"],
+        "sql_queries": ["SQL if needed"],
+        "estimated_time": "15 minutes",
+        "time_breakdown": {
+            "resolution_steps_time": "10 minutes",
+            "verification_steps_time": "3 minutes",
+            "sql_commands_time": "2 minutes"
+        },
+        "escalate": true/false,
+        "escalate_to": "Vessel Management Team / Container Team / EDI/API Team / Product Team",
+        "escalate_reason": "Reason for escalation decision"
+    }"""
+
+_ESCALATION_RULES = """ESCALATION RULES:
+- High priority + confidence < 50% → escalate
+- Medium priority + confidence < 40% → escalate  
+- Low confidence (<40%) → escalate
+- High confidence (>70%) + clear KB solution → do NOT escalate
+
+Module escalation targets:
+- Container → Container Team
+- Vessel → Vessel Management Team
+- EDI/API → EDI/API Team
+- Unknown/Other → Product Team"""
+
+# Escalation targets by module, as listed in the escalation rules
+_ESCALATION_TEAMS = {
+    "Container": "Container Team",
+    "Vessel": "Vessel Management Team",
+    "EDI/API": "EDI/API Team",
+}
 
 
 class GPTAnalyzerOptimized:
     """Optimized GPT Analyzer with combined calls for faster performance."""
 
-    def __init__(self, api_key: str, endpoint: str, api_version: str, deployment: str):
-        self.client = AzureOpenAI(
-            api_key=api_key,
-            api_version=api_version,
-            azure_endpoint=endpoint,
+    # Prompt budgets in estimated tokens (about 4 characters each) for the
+    # alert and context sections
+    ALERT_PROMPT_TOKENS = 250
+    CONTEXT_PROMPT_TOKENS = 375
+    RESOLUTION_KB_TOKENS = 500
+    CASE_SOLUTION_TOKENS = 250
+
+    # Completion caps: single-call analysis (parse + root cause + resolution)
+    # and fallback call #2 (resolution only). The report is rendered locally,
+    # so neither answer carries markdown.
+    FULL_MAX_TOKENS = 1500
+    RESOLVE_MAX_TOKENS = 1200
+
+    # analyze_alerts_batch: alerts per request are capped by the input budget,
+    # by BATCH_MAX_ALERTS (accuracy drops on larger batches) and by how many
+    # full answers fit in BATCH_MAX_COMPLETION_TOKENS
+    BATCH_INPUT_TOKENS = 6000
+    BATCH_MAX_ALERTS = 16
+    BATCH_MAX_COMPLETION_TOKENS = 16000
+
+    # Independent GPT calls (batches, per-alert fallbacks) in flight at once;
+    # keeps bursts under the deployment's rate limit
+    MAX_CONCURRENT_CALLS = 10
+
+    # Evidence-based confidence (calculate_confidence_fast) below which a
+    # ticket is escalated, and below which escalation is suggested
+    ESCALATE_BELOW_CONFIDENCE = 40
+    SUGGEST_ESCALATION_BELOW_CONFIDENCE = 60
+
+    # Calls at or below this temperature are near-deterministic, so identical
+    # prompts (replayed or recurring alerts) reuse the stored answer for a day
+    RESPONSE_CACHE_SIZE = 1024
+    RESPONSE_CACHE_MAX_TEMPERATURE = 0.3
+    RESPONSE_CACHE_TTL = 24 * 3600  # seconds
+
+    # Static instructions and output schemas. Kept out of the user prompt so
+    # each request starts with an identical prefix the service can cache.
+    ANALYZE_SYSTEM_PROMPT = """You are an L2 support engineer analyzing technical alerts.
+Parse the alert AND identify the root cause in one analysis.
+
+Provide BOTH parsing AND root cause analysis in ONE JSON response:
+
+{
+""" + _PARSED_SCHEMA + ",\n" + _ROOT_CAUSE_SCHEMA + """
+}
+
+Be concise."""
+
+    RESOLVE_SYSTEM_PROMPT = """You are an L2 support engineer providing complete resolution guidance.
+Provide resolution steps AND an escalation decision in ONE response.
+
+Provide ONE JSON with resolution and escalation:
+
+{
+""" + _RESOLUTION_SCHEMA + """
+}
+
+""" + _ESCALATION_RULES + """
+
+Be concise."""
+
+    FULL_SYSTEM_PROMPT = """You are an L2 support engineer analyzing technical alerts.
+Parse the alert, identify the root cause, AND provide resolution steps and an escalation
+decision, all in ONE response. Use your root cause confidence when applying the
+escalation rules.
+
+Provide ONE JSON with parsing, root cause AND resolution:
+
+{
+""" + _PARSED_SCHEMA + ",\n" + _ROOT_CAUSE_SCHEMA + ",\n" + _RESOLUTION_SCHEMA + """
+}
+
+""" + _ESCALATION_RULES + """
+
+Be concise."""
+
+    BATCH_SYSTEM_PROMPT = """You are an L2 support engineer analyzing technical alerts.
+You receive several numbered alerts, each with its own evidence. For EACH alert
+independently, parse it, identify the root cause, AND provide resolution steps and
+an escalation decision. Use your root cause confidence when applying the escalation
+rules.
+
+Provide ONE JSON object {"alerts": [...]} with one entry per alert. Each entry has
+"index" (the number of the alert it describes) and these three sections:
+
+{
+""" + _PARSED_SCHEMA + ",\n" + _ROOT_CAUSE_SCHEMA + ",\n" + _RESOLUTION_SCHEMA + """
+}
+
+""" + _ESCALATION_RULES + """
+
+Be concise."""
+
+    def __init__(
+        self,
+        api_key: str,
+        endpoint: str,
+        api_version: str,
+        deployment: str,
+        response_cache_path: Optional[str] = None,
+    ):
+        self.client = create_azure_client(
+            api_key,
+            endpoint,
+            api_version,
             timeout=30.0,  # Add timeout to prevent hanging
         )
         self.deployment = deployment
+        # The client is synchronous, so independent calls overlap on threads
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.MAX_CONCURRENT_CALLS,
+            thread_name_prefix="l2-gpt",
+        )
+        # Answers keyed by the exact prompt, with an optional on-disk tier that
+        # survives restarts
+        self._response_cache = ResponseCache(maxsize=self.RESPONSE_CACHE_SIZE, ttl=self.RESPONSE_CACHE_TTL)
+        self._persistent_cache = (
+            PersistentResponseCache(response_cache_path, ttl=self.RESPONSE_CACHE_TTL)
+            if response_cache_path else None
+        )
 
-    def _call_gpt(self, system_prompt: str, user_prompt: str, temperature: float = 0.3, max_tokens: int = 2000) -> str:
-        """Call Azure OpenAI with timeout protection."""
+    def _call_gpt(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.3,
+        max_tokens: int = 2000,
+        response_format: Optional[Dict] = None,
+    ) -> str:
+        """
+        Call Azure OpenAI with timeout protection.
+        
+        response_format (a strict JSON schema) makes the API return exactly
+        the expected shape and enum values. Low-temperature calls are served
+        from the response cache when possible.
+        """
+        use_cache = temperature <= self.RESPONSE_CACHE_MAX_TEMPERATURE
+        if use_cache:
+            key = cache_key(self.deployment, system_prompt, user_prompt, temperature, max_tokens, response_format)
+            cached = self._response_cache.get(key)
+            if cached is None and self._persistent_cache is not None:
+                cached = self._persistent_cache.get(key)
+                if cached is not None:
+                    self._response_cache.set(key, cached)
+            if cached is not None:
+                return cached
+
+        options = {"response_format": response_format} if response_format else {}
         try:
             response = self.client.chat.completions.create(
                 model=self.deployment,
@@ -32,81 +236,206 @@ class GPTAnalyzerOptimized:
                 ],
                 temperature=temperature,
                 max_tokens=max_tokens,
+                **options,
             )
-            return response.choices[0].message.content
+            self._log_cached_tokens(getattr(response, "usage", None))
+            content = response.choices[0].message.content
         except Exception as exc:
             print(f"⚠️  GPT API Error: {exc}")
             return "{}"
 
-    def analyze_alert_and_root_cause(
+        if use_cache and content:
+            self._response_cache.set(key, content)
+            if self._persistent_cache is not None:
+                self._persistent_cache.set(key, content)
+        return content
+
+    @staticmethod
+    def _log_cached_tokens(usage):
+        """
+        Report how much of the prompt Azure served from its prompt cache.
+        
+        The system prompts are static and the KB section (shared by tickets of
+        a module) comes first in the user prompt, so warm calls should show
+        cached tokens once that prefix passes the 1024-token minimum.
+        """
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) or 0
+        if cached:
+            print(f"Azure OpenAI prompt cache hit: {cached}/{usage.prompt_tokens} prompt tokens")
+
+    def analyze_full(
         self,
         alert_text: str,
         log_evidence: str,
         case_context: str,
         kb_context: str,
-    ) -> Dict:
+    ) -> Optional[Dict]:
         """
-        COMBINED CALL #1: Parse alert AND analyze root cause in one GPT call.
-        This replaces 2 separate calls (parse_alert + analyze_root_cause).
+        SINGLE CALL: Parse, root cause, resolution AND escalation in one GPT
+        call, sending the system prompt and evidence once. The report is
+        rendered from the answer, so GPT never writes it out.
+        
+        Past case solutions are part of case_context. The model applies the
+        escalation rules with its own root cause confidence, since the
+        evidence-based score is only computed after the call; callers then
+        pass the answer through apply_escalation_policy with that score.
+        
+        Returns {"parsed", "root_cause", "resolution", "report"}, or None when
+        the response is incomplete so the caller can fall back to
+        analyze_alert_and_root_cause + generate_resolution_and_decision.
+        """
+        response = self._call_gpt(
+            self.FULL_SYSTEM_PROMPT,
+            self._full_evidence_prompt(alert_text, log_evidence, case_context, kb_context),
+            temperature=0.2,
+            max_tokens=self.FULL_MAX_TOKENS,
+            response_format=FULL_ANALYSIS_FORMAT,
+        )
+        return self._complete_full_result(parse_json_object(response))
+
+    def analyze_alerts_batch(self, items: List[Dict]) -> List[Optional[Dict]]:
+        """
+        BATCHED CALL: analyze_full for several alerts in one GPT call per batch.
+        
+        For a backlog of queued alerts: the system prompt and round trip are
+        paid once per batch. Each item holds analyze_full's arguments
+        (alert_text, log_evidence, case_context, kb_context). Alerts missing or
+        incomplete in the batched answer fall back to analyze_full.
+        
+        Returns: analyze_full results in input order (None where that failed too)
         """
-        system_prompt = """You are an L2 support engineer analyzing technical alerts.
-Parse the alert AND identify the root cause in one analysis."""
+        sections = [self._full_evidence_prompt(**item) for item in items]
+        max_alerts = min(self.BATCH_MAX_ALERTS, self.BATCH_MAX_COMPLETION_TOKENS // self.FULL_MAX_TOKENS)
+
+        # Greedy batches under the input budget; an alert too large for the
+        # budget on its own still goes in a batch by itself
+        batches, group, used = [], [], 0
+        for index, section in enumerate(sections):
+            cost = estimate_tokens(section)
+            if group and (used + cost > self.BATCH_INPUT_TOKENS or len(group) >= max_alerts):
+                batches.append(group)
+                group, used = [], 0
+            group.append(index)
+            used += cost
+        if group:
+            batches.append(group)
+
+        # Batches are independent requests, so they run concurrently
+        shared = [group for group in batches if len(group) > 1]  # A lone alert goes through analyze_full
+        results: List[Optional[Dict]] = [None] * len(items)
+        responses = self._executor.map(
+            lambda group: self._request_batch([sections[index] for index in group]), shared
+        )
+        for group, response in zip(shared, responses):
+            entries = (parse_json_object(response) or {}).get("alerts")
+            for entry in entries if isinstance(entries, list) else []:
+                number = entry.get("index") if isinstance(entry, dict) else None
+                if isinstance(number, int) and 1 <= number <= len(group):
+                    results[group[number - 1]] = self._complete_full_result(entry)
+
+        # Alerts the batched calls missed are analyzed one at a time, concurrently
+        missing = [index for index, result in enumerate(results) if result is None]
+        fallbacks = self._executor.map(lambda index: self.analyze_full(**items[index]), missing)
+        for index, result in zip(missing, fallbacks):
+            results[index] = result
+        return results
+
+    def _request_batch(self, sections: List[str]) -> str:
+        """Send one analyze_alerts_batch request for the given alert sections."""
+        user_prompt = "Analyze alerts:\n\n" + "\n\n".join(
+            f"[{number}]\n{section}" for number, section in enumerate(sections, start=1)
+        )
+        return self._call_gpt(
+            self.BATCH_SYSTEM_PROMPT,
+            user_prompt,
+            temperature=0.2,
+            max_tokens=self.FULL_MAX_TOKENS * len(sections),
+            response_format=FULL_ANALYSIS_LIST_FORMAT,
+        )
 
-        # Limit context to prevent slow responses
-        log_context = log_evidence[:1500] if log_evidence else "No logs found"
-        case_ctx = case_context[:1500] if case_context else "No similar cases"
-        kb_ctx = kb_context[:1500] if kb_context else "No KB articles"
+    def _full_evidence_prompt(
+        self,
+        alert_text: str,
+        log_evidence: str,
+        case_context: str,
+        kb_context: str,
+    ) -> str:
+        """Per-alert prompt section for analyze_full and analyze_alerts_batch."""
+        alert_ctx = pack_text(alert_text, self.ALERT_PROMPT_TOKENS, separator="\n")
+        log_context = pack_text(log_evidence, self.CONTEXT_PROMPT_TOKENS, separator="\n") if log_evidence else "No logs found"
+        case_ctx = pack_text(case_context, self.CONTEXT_PROMPT_TOKENS) if case_context else "No similar cases"
+        kb_ctx = pack_text(kb_context, self.RESOLUTION_KB_TOKENS) if kb_context else "No KB articles"
+
+        return f"""KNOWLEDGE BASE:
+{kb_ctx}
 
-        user_prompt = f"""Analyze this alert in ONE response:
+PAST CASES:
+{case_ctx}
 
 ALERT:
-{alert_text[:1000]}
+{alert_ctx}
 
 LOG EVIDENCE:
-{log_context}
+{log_context}"""
 
-PAST CASES:
-{case_ctx}
+    def _complete_full_result(self, result: Optional[Dict]) -> Optional[Dict]:
+        """
+        Validate a combined answer and render its report; None unless all
+        three sections are present.
+        """
+        if not result:
+            return None
+        parsed = result.get("parsed")
+        root_cause = result.get("root_cause")
+        resolution = result.get("resolution")
+        if not (isinstance(parsed, dict) and isinstance(root_cause, dict) and isinstance(resolution, dict)):
+            return None
+
+        return {
+            "parsed": parsed,
+            "root_cause": root_cause,
+            "resolution": resolution,
+            "report": self._render_report(parsed, root_cause, resolution),
+        }
 
-KNOWLEDGE BASE:
+    def analyze_alert_and_root_cause(
+        self,
+        alert_text: str,
+        log_evidence: str,
+        case_context: str,
+        kb_context: str,
+    ) -> Dict:
+        """
+        COMBINED CALL #1: Parse alert AND analyze root cause in one GPT call.
+        This replaces 2 separate calls (parse_alert + analyze_root_cause).
+        """
+        system_prompt = self.ANALYZE_SYSTEM_PROMPT
+
+        # Limit context to prevent slow responses, keeping whole log lines,
+        # cases and articles
+        alert_ctx = pack_text(alert_text, self.ALERT_PROMPT_TOKENS, separator="\n")
+        log_context = pack_text(log_evidence, self.CONTEXT_PROMPT_TOKENS, separator="\n") if log_evidence else "No logs found"
+        case_ctx = pack_text(case_context, self.CONTEXT_PROMPT_TOKENS) if case_context else "No similar cases"
+        kb_ctx = pack_text(kb_context, self.CONTEXT_PROMPT_TOKENS) if kb_context else "No KB articles"
+
+        # The output schema lives in the static system prompt; only per-ticket
+        # data goes here, so every request shares the same cacheable prefix
+        user_prompt = f"""KNOWLEDGE BASE:
 {kb_ctx}
 
-Provide BOTH parsing AND root cause analysis in ONE JSON response:
+PAST CASES:
+{case_ctx}
 
-{{
-    "parsed": {{
-        "ticket_id": "Extract from alert (e.g., ALR-123, INC-456)",
-        "module": "MUST be one of: Container, Vessel, EDI/API (EDI issues must always be EDI/API, never just EDI)",
-        "entity_id": "Container/Vessel ID or IFT number",
-        "channel": "Email/SMS/Call",
-        "priority": "High/Medium/Low",
-        "symptoms": ["brief", "keywords"],
-        "error_code": "if any"
-    }},
-    "root_cause": {{
-        "root_cause": "Brief root cause (one sentence)",
-        "technical_details": "Technical explanation",
-        "confidence": 50-100,
-        "evidence_summary": ["Key evidence point 1", "Key evidence point 2"]
-    }}
-}}
+ALERT:
+{alert_ctx}
 
-Return ONLY valid JSON. Be concise."""
+LOG EVIDENCE:
+{log_context}"""
 
-        response = self._call_gpt(system_prompt, user_prompt, temperature=0.2, max_tokens=1500)
-        try:
-            result = json.loads(response)
-            
-            # FORCE EDI to be EDI/API - hard override
-            parsed_data = result.get("parsed", {})
-            if parsed_data.get("module") == "EDI":
-                parsed_data["module"] = "EDI/API"
-            
-            return {
-                "parsed": parsed_data,
-                "root_cause": result.get("root_cause", {})
-            }
-        except json.JSONDecodeError:
+        response = self._call_gpt(system_prompt, user_prompt, temperature=0.2, max_tokens=1500, response_format=ANALYSIS_FORMAT)
+        result = parse_json_object(response)
+        if result is None:
             # Fallback
             return {
                 "parsed": {
@@ -125,6 +454,11 @@ Return ONLY valid JSON. Be concise."""
                 }
             }
 
+        return {
+            "parsed": result.get("parsed", {}),
+            "root_cause": result.get("root_cause", {})
+        }
+
     def generate_resolution_and_decision(
         self,
         parsed: Dict,
@@ -136,27 +470,31 @@ Return ONLY valid JSON. Be concise."""
         log_evidence: str,
     ) -> Dict:
         """
-        COMBINED CALL #2: Generate resolution, escalation decision, AND report in one GPT call.
+        COMBINED CALL #2: Generate resolution AND escalation decision in one GPT call,
+        then render the report from them.
         This replaces 3+ separate calls (resolution, escalation, report).
         """
-        system_prompt = """You are an L2 support engineer providing complete resolution guidance.
-Provide resolution steps, escalation decision, AND a diagnostic report in ONE response."""
+        system_prompt = self.RESOLVE_SYSTEM_PROMPT
 
         # Limit context
-        kb_ctx = kb_context[:2000] if kb_context else "No KB guidance"
-        case_sol = case_solutions[:1000] if case_solutions else "No past solutions"
+        kb_ctx = pack_text(kb_context, self.RESOLUTION_KB_TOKENS) if kb_context else "No KB guidance"
+        case_sol = pack_text(case_solutions, self.CASE_SOLUTION_TOKENS) if case_solutions else "No past solutions"
 
         priority = parsed.get("priority", "Medium")
         module = parsed.get("module", "Unknown")
         
         # Escalation logic hints
         should_escalate_hint = ""
-        if priority == "High" or confidence_score < 40:
+        if self._escalation_required(priority, confidence_score):
             should_escalate_hint = "ESCALATION RECOMMENDED due to high priority or low confidence."
-        elif confidence_score < 60:
+        elif confidence_score < self.SUGGEST_ESCALATION_BELOW_CONFIDENCE:
             should_escalate_hint = "Consider escalation if issue persists."
         
-        user_prompt = f"""Provide COMPLETE resolution guidance for this issue:
+        user_prompt = f"""KNOWLEDGE BASE:
+{kb_ctx}
+
+PAST SOLUTIONS:
+{case_sol}
 
 PROBLEM:
 Ticket: {parsed.get('ticket_id', 'Unknown')}
@@ -165,70 +503,98 @@ Priority: {priority}
 Root Cause: {root_cause.get('root_cause', 'Unknown')}
 Confidence: {confidence_score}%
 
-{should_escalate_hint}
-
-KNOWLEDGE BASE:
-{kb_ctx}
+{should_escalate_hint}"""
 
-PAST SOLUTIONS:
-{case_sol}
+        response = self._call_gpt(system_prompt, user_prompt, temperature=0.2, max_tokens=self.RESOLVE_MAX_TOKENS, response_format=RESOLUTION_RESULT_FORMAT)
+        result = parse_json_object(response)
+        if result is None:
+            return {
+                "resolution": self._get_fallback_resolution(parsed),
+                "report": "# Diagnostic Report\n\n## Issue\nAnalysis completed with limited information.\n\n## Recommendation\nManual investigation required."
+            }
 
-Provide ONE JSON with resolution, escalation, AND markdown report:
+        resolution = result.get("resolution", self._get_fallback_resolution(parsed))
+        return {
+            "resolution": resolution,
+            "report": self._render_report(parsed, root_cause, resolution)
+        }
 
-{{
-    "resolution": {{
-        "resolution_steps": [
-            "Step 1: Specific action",
-            "Step 2: Next action",
-            "Step 3: Continue..."
-        ],
-        "verification_steps": ["How to verify"],
-        "sql_queries": ["SQL if needed"],
-        "estimated_time": "15 minutes",
-        "time_breakdown": {{
-            "resolution_steps_time": "10 minutes",
-            "verification_steps_time": "3 minutes",
-            "sql_commands_time": "2 minutes"
-        }},
-        "escalate": true/false,
-        "escalate_to": "Vessel Management Team / Container Team / EDI/API Team / Product Team",
-        "escalate_reason": "Reason for escalation decision"
-    }},
-    "report": "# Diagnostic Report\\n\\n## Issue\\n[Summary]\\n\\n## Root Cause\\n[Analysis]\\n\\n## Resolution\\n[Steps]"
-}}
+    def _escalation_required(self, priority: str, confidence_score: int) -> bool:
+        """Whether priority or the evidence-based confidence call for escalation."""
+        return priority == "High" or confidence_score < self.ESCALATE_BELOW_CONFIDENCE
 
-ESCALATION RULES:
-- High priority + confidence < 50% → escalate
-- Medium priority + confidence < 40% → escalate  
-- Low confidence (<40%) → escalate
-- High confidence (>70%) + clear KB solution → do NOT escalate
+    def apply_escalation_policy(self, result: Dict, confidence_score: int) -> Dict:
+        """
+        Apply the escalation rule of generate_resolution_and_decision to an
+        analyze_full answer, using the evidence-based confidence_score.
+        
+        The single call decides escalation from the model's own confidence;
+        tickets that are high priority or below ESCALATE_BELOW_CONFIDENCE are
+        escalated regardless, and the report is re-rendered to match.
+        
+        Returns {"resolution", "report"}
+        """
+        parsed = result["parsed"]
+        resolution = result["resolution"]
+        priority = parsed.get("priority", "Medium")
+        if resolution.get("escalate") or not self._escalation_required(priority, confidence_score):
+            return {"resolution": resolution, "report": result["report"]}
 
-Module escalation targets:
-- Container → Container Team
-- Vessel → Vessel Management Team
-- EDI/API → EDI/API Team
-- Unknown/Other → Product Team
+        reason = (
+            "High priority incident"
+            if priority == "High"
+            else f"Low evidence-based confidence ({confidence_score}%)"
+        )
+        resolution = {
+            **resolution,
+            "escalate": True,
+            "escalate_to": _ESCALATION_TEAMS.get(parsed.get("module"), "Product Team"),
+            "escalate_reason": reason,
+        }
+        return {
+            "resolution": resolution,
+            "report": self._render_report(parsed, result["root_cause"], resolution),
+        }
 
-Return ONLY valid JSON. Keep report concise (max 500 words)."""
+    @staticmethod
+    def _render_report(parsed: Dict, root_cause: Dict, resolution: Dict) -> str:
+        """Render the markdown diagnostic report from the structured answer."""
+        lines = [
+            "# Diagnostic Report",
+            "",
+            "## Issue",
+            f"**Ticket:** {parsed.get('ticket_id', 'Unknown')} | **Module:** {parsed.get('module', 'Unknown')} "
+            f"| **Priority:** {parsed.get('priority', 'Medium')}",
+        ]
+        if parsed.get("entity_id"):
+            lines.append(f"**Entity:** {parsed['entity_id']}")
+        if parsed.get("error_code"):
+            lines.append(f"**Error code:** {parsed['error_code']}")
+        if parsed.get("symptoms"):
+            lines.append(f"**Symptoms:** {', '.join(parsed['symptoms'])}")
+
+        lines += ["", "## Root Cause", root_cause.get("root_cause", "Unable to determine")]
+        if root_cause.get("technical_details"):
+            lines += ["", root_cause["technical_details"]]
+        lines += ["", f"**Confidence:** {root_cause.get('confidence', 'Unknown')}%"]
+        if root_cause.get("evidence_summary"):
+            lines += ["", "**Evidence:**"] + [f"- {point}" for point in root_cause["evidence_summary"]]
+
+        lines += ["", "## Resolution"] + [f"- {step}" for step in resolution.get("resolution_steps", [])]
+        if resolution.get("verification_steps"):
+            lines += ["", "### Verification"] + [f"- {step}" for step in resolution["verification_steps"]]
+        if resolution.get("sql_queries"):
+            lines += ["", "### SQL", "```sql", *resolution["sql_queries"], "```"]
+        lines += ["", f"**Estimated time:** {resolution.get('estimated_time', 'Unknown')}"]
+
+        reason = resolution.get("escalate_reason")
+        if resolution.get("escalate"):
+            decision = f"Escalate to **{resolution.get('escalate_to') or 'Product Team'}**"
+        else:
+            decision = "No escalation needed"
+        lines += ["", "## Escalation", f"{decision}: {reason}" if reason else decision]
 
-        response = self._call_gpt(system_prompt, user_prompt, temperature=0.2, max_tokens=2500)
-        try:
-            result = json.loads(response)
-            
-            # FORCE EDI to be EDI/API in escalation target - hard override
-            resolution = result.get("resolution", self._get_fallback_resolution(parsed))
-            if resolution.get("escalate_to"):
-                resolution["escalate_to"] = resolution["escalate_to"].replace("EDI Team", "EDI/API Team").replace(" EDI ", " EDI/API ")
-            
-            return {
-                "resolution": resolution,
-                "report": result.get("report", "# Diagnostic Report\n\nAnalysis in progress...")
-            }
-        except json.JSONDecodeError:
-            return {
-                "resolution": self._get_fallback_resolution(parsed),
-                "report": "# Diagnostic Report\n\n## Issue\nAnalysis completed with limited information.\n\n## Recommendation\nManual investigation required."
-            }
+        return "\n".join(lines)
 
     def _get_fallback_resolution(self, parsed: Dict) -> Dict:
         """Fallback resolution when GPT fails."""
@@ -69,6 +69,15 @@ class ImpactAssessor:
             "vessel advice", "berth booking", "container booking"
         ]
         
+        # One alternation over both keyword lists, matched in a single pass.
+        # The zero-width lookahead lets keywords that overlap at different
+        # positions all match; at any one position only the longest keyword
+        # matches, so a keyword that is a prefix of another (e.g. "error" and
+        # "error code") would be missed there. No two keywords share a prefix
+        # today; keep it that way when editing the lists.
+        keywords = sorted(set(self.customer_keywords) | set(self.transaction_keywords), key=len, reverse=True)
+        self._keyword_pattern = re.compile("(?=(" + "|".join(map(re.escape, keywords)) + "))")
+        
         # Impact thresholds
         self.impact_thresholds = {
             "high": 70,      # Immediate escalation
@@ -114,13 +123,11 @@ class ImpactAssessor:
         
         # Factor 3: Customer Mentions (+20 points)
         alert_text = parsed_alert.get("alert_text", "").lower()
-        customer_impact = 0
-        customer_mentions = []
+        found_keywords = set(self._keyword_pattern.findall(alert_text))
         
-        for keyword in self.customer_keywords:
-            if keyword in alert_text:
-                customer_impact += 5  # Each keyword adds 5 points, max 20
-                customer_mentions.append(keyword)
+        # Keep list order so the details read the same for the same alert
+        customer_mentions = [keyword for keyword in self.customer_keywords if keyword in found_keywords]
+        customer_impact = 5 * len(customer_mentions)  # Each keyword adds 5 points, max 20
         
         customer_impact = min(customer_impact, 20)  # Cap at 20
         impact_score += customer_impact
@@ -140,13 +147,8 @@ class ImpactAssessor:
         }
         
         # Factor 5: Transaction Context (+15 points)
-        transaction_impact = 0
-        transaction_indicators = []
-        
-        for keyword in self.transaction_keywords:
-            if keyword in alert_text:
-                transaction_impact += 3  # Each keyword adds 3 points, max 15
-                transaction_indicators.append(keyword)
+        transaction_indicators = [keyword for keyword in self.transaction_keywords if keyword in found_keywords]
+        transaction_impact = 3 * len(transaction_indicators)  # Each keyword adds 3 points, max 15
         
         transaction_impact = min(transaction_impact, 15)  # Cap at 15
         impact_score += transaction_impact
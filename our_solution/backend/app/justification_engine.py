@@ -3,8 +3,41 @@ Justification Engine Module
 Provides structured explanations for escalation decisions.
 """
 
+import re
 from typing import Dict, List, Optional
 
+from .kb_searcher import has_resolution
+
+
+# Risk factors as (trigger words, risk), listed in report order. Error codes and
+# alert text are each scanned once with a single alternation of their triggers;
+# the lookahead lets overlapping triggers all match.
+_ERROR_CODE_RISKS = (
+    (("vessel",), "Vessel scheduling disruption"),
+    (("container",), "Container operations impact"),
+    (("edi",), "EDI message processing failure"),
+    (("database",), "Database connectivity issues"),
+)
+_ALERT_TEXT_RISKS = (
+    (("customer",), "Customer service impact"),
+    (("urgent", "critical"), "Time-sensitive resolution required"),
+)
+
+
+def _trigger_pattern(risks) -> re.Pattern:
+    words = [word for triggers, _ in risks for word in triggers]
+    return re.compile("(?=(" + "|".join(map(re.escape, words)) + "))")
+
+
+_ERROR_CODE_PATTERN = _trigger_pattern(_ERROR_CODE_RISKS)
+_ALERT_TEXT_PATTERN = _trigger_pattern(_ALERT_TEXT_RISKS)
+
+
+def _matched_risks(pattern: re.Pattern, risks, text: str) -> List[str]:
+    """Risks whose trigger words occur in the (lowercased) text, in table order."""
+    found = set(pattern.findall(text))
+    return [risk for triggers, risk in risks if found.intersection(triggers)]
+
 
 class JustificationEngine:
     """Generate structured explanations for escalation decisions."""
@@ -152,14 +185,10 @@ class JustificationEngine:
                 "score_contribution": "0%"
             }
         
-        # Check if articles have resolution procedures
-        has_resolution = any(
-            "Resolution" in article.get("content", "") or 
-            "Verification" in article.get("content", "")
-            for article in kb_articles[:3]
-        )
+        # Check if articles have resolution procedures (flagged when the KB is parsed)
+        documents_resolution = any(has_resolution(article) for article in kb_articles[:3])
         
-        if has_resolution:
+        if documents_resolution:
             return {
                 "status": "excellent",
                 "explanation": f"Found {kb_count} articles with resolution procedures",
@@ -304,14 +333,7 @@ class JustificationEngine:
         
         # Error-based risks
         if error_code:  # Only if error_code is not None
-            if "vessel" in error_code.lower():
-                risk_factors.append("Vessel scheduling disruption")
-            if "container" in error_code.lower():
-                risk_factors.append("Container operations impact")
-            if "edi" in error_code.lower():
-                risk_factors.append("EDI message processing failure")
-            if "database" in error_code.lower():
-                risk_factors.append("Database connectivity issues")
+            risk_factors.extend(_matched_risks(_ERROR_CODE_PATTERN, _ERROR_CODE_RISKS, error_code.lower()))
         
         # Module-based risks
         if module == "Vessel":
@@ -322,9 +344,6 @@ class JustificationEngine:
             risk_factors.append("External partner communication")
         
         # Context-based risks
-        if "customer" in alert_text:
-            risk_factors.append("Customer service impact")
-        if "urgent" in alert_text or "critical" in alert_text:
-            risk_factors.append("Time-sensitive resolution required")
+        risk_factors.extend(_matched_risks(_ALERT_TEXT_PATTERN, _ALERT_TEXT_RISKS, alert_text))
         
         return risk_factors if risk_factors else ["Standard operational risk"]
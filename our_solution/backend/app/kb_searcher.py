@@ -2,16 +2,63 @@
 Knowledge Base search functionality.
 """
 
+import re
 from typing import List, Dict
 
+from .response_cache import ResponseCache
+
+# Context text when nothing matched; also recognised by the confidence scoring
+MISSING_KB = "No relevant knowledge base articles found."
+
+# Article header line; group 1 is the module prefix
+_HEADER_PATTERN = re.compile(r"(CNTR|VSL|VAS|EDI|API):")
+# Map VAS to VSL and EDI to EDI/API for consistency
+_MODULE_ALIASES = {"VAS": "VSL", "EDI": "EDI/API", "API": "EDI/API"}
+# Article text that documents a resolution procedure
+_RESOLUTION_PATTERN = re.compile(r"Resolution|Verification")
+
+# Article keys computed at parse time for the scoring code; not part of the
+# knowledgeBase payload
+_INTERNAL_FIELDS = ("has_resolution",)
+
+
+def has_resolution(article: Dict) -> bool:
+    """Whether a KB article documents a resolution procedure."""
+    flag = article.get("has_resolution")
+    if flag is None:
+        # Articles not built by a KnowledgeBaseSearcher carry no flag
+        flag = bool(_RESOLUTION_PATTERN.search(article.get("content", "")))
+    return flag
+
+
+def public_articles(articles: List[Dict]) -> List[Dict]:
+    """Copies of the articles without the parse-time scoring keys, for results."""
+    return [
+        {key: value for key, value in article.items() if key not in _INTERNAL_FIELDS}
+        for article in articles
+    ]
+
 
 class KnowledgeBaseSearcher:
     """Search and retrieve knowledge base articles."""
 
+    # Distinct keyword queries remembered; triage repeats the same symptom and
+    # error code lookups across tickets
+    KEYWORD_CACHE_SIZE = 512
+
     def __init__(self, kb_path: str):
         self.kb_path = kb_path
         self.content = self._load_kb()
         self.articles = self._parse_articles()
+        # Lowercased title + content per article, built once for keyword search
+        self._search_texts = [
+            (article["title"] + "\n" + article["content"]).lower() for article in self.articles
+        ]
+        self._keyword_cache = ResponseCache(maxsize=self.KEYWORD_CACHE_SIZE)
+        # Articles grouped by module (upper-case), for search_by_module
+        self._articles_by_module: Dict[str, List[Dict]] = {}
+        for article in self.articles:
+            self._articles_by_module.setdefault(article["module"].upper(), []).append(article)
 
     def _load_kb(self) -> str:
         """Load knowledge base content."""
@@ -25,43 +72,55 @@ class KnowledgeBaseSearcher:
         """Parse KB into individual articles."""
         articles = []
         current_article = None
+        # Content lines of the current article, joined once when it closes
+        current_lines: List[str] = []
 
         for line in self.content.split("\n"):
-            if line.startswith(("CNTR:", "VSL:", "VAS:", "EDI:", "API:")):
+            header = _HEADER_PATTERN.match(line)
+            if header:
                 if current_article:
+                    current_article["content"] = "".join(current_lines)
                     articles.append(current_article)
-                # Map VAS to VSL and EDI to EDI/API for consistency
-                module = line.split(":")[0] if ":" in line else "Unknown"
-                if module == "VAS":
-                    module = "VSL"
-                elif module == "EDI":
-                    module = "EDI/API"
-                elif module == "API":
-                    module = "EDI/API"
+                current_lines = []
+                module = _MODULE_ALIASES.get(header.group(1), header.group(1))
                 current_article = {
                     "title": line.strip(),
                     "content": "",
                     "module": module,
                 }
             elif current_article:
-                current_article["content"] += line + "\n"
+                current_lines.append(line + "\n")
 
         if current_article:
+            current_article["content"] = "".join(current_lines)
             articles.append(current_article)
 
+        for article in articles:
+            article["has_resolution"] = bool(_RESOLUTION_PATTERN.search(article["content"]))
+
         return articles
 
     def search_by_keywords(self, keywords: List[str]) -> List[Dict]:
         """Search for articles containing keywords."""
+        # Keyword order does not affect scores or ranking, so it is not part of the key
+        lowered_keywords = tuple(sorted(keyword.lower() for keyword in keywords))
+        matching_articles = self._keyword_cache.get(lowered_keywords)
+        if matching_articles is None:
+            matching_articles = self._search_keywords(lowered_keywords)
+            self._keyword_cache.set(lowered_keywords, matching_articles)
+        # Fresh dicts per caller, so annotating a result cannot alter later hits
+        return [dict(article) for article in matching_articles]
+
+    def _search_keywords(self, lowered_keywords: tuple) -> List[Dict]:
+        """Score every article against already-lowercased keywords."""
         matching_articles = []
 
-        for article in self.articles:
-            full_text = (article["title"] + "\n" + article["content"]).lower()
-            keyword_matches = sum(1 for keyword in keywords if keyword.lower() in full_text)
+        for article, full_text in zip(self.articles, self._search_texts):
+            keyword_matches = sum(1 for keyword in lowered_keywords if keyword in full_text)
 
             if keyword_matches > 0:
                 matching_articles.append(
-                    {**article, "relevance_score": keyword_matches / len(keywords)}
+                    {**article, "relevance_score": keyword_matches / len(lowered_keywords)}
                 )
 
         matching_articles.sort(key=lambda x: x["relevance_score"], reverse=True)
@@ -81,7 +140,7 @@ class KnowledgeBaseSearcher:
         # Try to map the module name, otherwise use as-is
         target_module = module_map.get(module.lower(), module.upper())
         
-        return [article for article in self.articles if article["module"].upper() == target_module.upper()]
+        return list(self._articles_by_module.get(target_module.upper(), []))
 
     def get_article_by_title(self, title: str) -> Dict:
         """Get a specific article by title."""
@@ -93,7 +152,7 @@ class KnowledgeBaseSearcher:
     def format_articles(self, articles: List[Dict], max_articles: int = 3) -> str:
         """Format articles as readable text for GPT context."""
         if not articles:
-            return "No relevant knowledge base articles found."
+            return MISSING_KB
 
         output = []
         for i, article in enumerate(articles[:max_articles]):
@@ -5,6 +5,9 @@ Log file search functionality.
 import os
 from typing import List, Dict
 
+# Evidence text when nothing matched; also recognised by the confidence scoring
+MISSING_LOGS = "No relevant log entries found."
+
 
 class LogSearcher:
     """Search application log files for evidence."""
@@ -88,7 +91,7 @@ class LogSearcher:
     def format_evidence(self, results: List[Dict], max_results: int = 10) -> str:
         """Format log search results as a readable string."""
         if not results:
-            return "No relevant log entries found."
+            return MISSING_LOGS
 
         output = []
         for result in results[:max_results]:
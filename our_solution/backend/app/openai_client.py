@@ -0,0 +1,64 @@
+"""
+Shared Azure OpenAI HTTP connection pool.
+Every analyzer's AzureOpenAI client sends requests through one keep-alive
+httpx pool, so warm TLS connections are reused across analyzers instead of
+each client opening its own.
+"""
+
+from threading import Lock
+from typing import Optional
+
+import httpx
+from openai import AzureOpenAI
+
+try:
+    import h2  # HTTP/2 support for httpx (pip install httpx[http2])
+except ImportError:
+    h2 = None
+
+# Connection pool sized for concurrent tickets across all analyzers
+MAX_CONNECTIONS = 64
+MAX_KEEPALIVE_CONNECTIONS = 32
+# Idle connections stay open this long (seconds), so a pause between tickets
+# does not cost a new TLS handshake
+KEEPALIVE_EXPIRY = 60.0
+
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Return the process-wide httpx client, creating it on first use.
+
+    With h2 installed, concurrent requests are multiplexed over HTTP/2 on
+    the same connection; otherwise the pool uses HTTP/1.1 keep-alive.
+    """
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(60.0, connect=5.0),
+                http2=h2 is not None,
+            )
+        return _http_client
+
+
+def create_azure_client(api_key: str, endpoint: str, api_version: str, **options) -> AzureOpenAI:
+    """
+    Build an AzureOpenAI client on the shared connection pool.
+
+    options are passed through to AzureOpenAI (e.g. timeout, max_retries).
+    """
+    return AzureOpenAI(
+        api_key=api_key,
+        api_version=api_version,
+        azure_endpoint=endpoint,
+        http_client=get_http_client(),
+        **options,
+    )
@@ -0,0 +1,43 @@
+"""
+Token budgets for prompt context.
+Context is trimmed by estimated tokens rather than raw character counts, and
+always at chunk, line or word boundaries, so prompts stay within budget without
+cutting words or log lines in half.
+"""
+
+# Average characters per GPT token for English/log text (no tokenizer dependency)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough GPT token count for English/log text (about 4 characters per token)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def pack_text(text: str, max_tokens: int, separator: str = "\n\n") -> str:
+    """
+    Keep the leading separator-delimited chunks of text that fit a token budget.
+
+    Context is ordered by relevance, so this keeps whole top chunks (articles,
+    log lines) instead of cutting mid-word at a fixed character count. A first
+    chunk that alone exceeds the budget is cut back to its last full line, or
+    its last full word when the budget does not reach a line break.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    kept, used = [], 0
+    for chunk in text.split(separator):
+        cost = estimate_tokens(chunk + separator)
+        if used + cost > max_tokens:
+            break
+        kept.append(chunk)
+        used += cost
+    if kept:
+        return separator.join(kept)
+
+    head = text[: max_tokens * CHARS_PER_TOKEN]
+    for boundary in ("\n", " "):
+        if boundary in head:
+            return head.rsplit(boundary, 1)[0]
+    return head
@@ -0,0 +1,54 @@
+"""
+Client-side throttling for Azure OpenAI calls.
+Caps in-flight requests and paces them under the deployment's RPM quota so
+concurrent tickets share the quota instead of tripping 429s.
+"""
+
+import time
+from threading import BoundedSemaphore, Lock
+from typing import Optional
+
+
+class RequestThrottle:
+    """Concurrency cap plus a requests-per-minute token bucket, shared across threads."""
+
+    def __init__(self, max_concurrency: int = 16, requests_per_minute: Optional[int] = None):
+        self._slots = BoundedSemaphore(max_concurrency)
+        self.requests_per_minute = requests_per_minute
+        # Bucket holds at most one minute's worth of requests
+        self._tokens = float(requests_per_minute or 0)
+        self._last_refill = time.monotonic()
+        self._lock = Lock()
+
+    def _wait_for_token(self):
+        """Block until the RPM bucket has a token, then take it."""
+        if not self.requests_per_minute:
+            return
+
+        rate = self.requests_per_minute / 60.0  # tokens per second
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    float(self.requests_per_minute),
+                    self._tokens + (now - self._last_refill) * rate,
+                )
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / rate
+            time.sleep(wait)
+
+    def __enter__(self):
+        self._slots.acquire()
+        try:
+            self._wait_for_token()
+        except BaseException:
+            self._slots.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._slots.release()
+        return False
@@ -0,0 +1,213 @@
+"""
+Response caches for Azure OpenAI calls.
+Thread-safe LRU for repeated prompts, an optional SQLite store that keeps
+responses across restarts, and an embedding-based cache for near-duplicate
+alerts.
+"""
+
+import hashlib
+import math
+import operator
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def cache_key(*parts) -> str:
+    """Build a compact, collision-resistant key from prompt parts."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x1f")  # Separator so ("ab", "c") != ("a", "bc")
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    Bounded least-recently-used cache shared between request threads.
+
+    With a ttl, entries also expire that many seconds after being stored.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (value, expiry time or None)
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        """Store a value, evicting the least recently used entries."""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class PersistentResponseCache:
+    """
+    SQLite-backed response store that survives process restarts.
+
+    Values are strings (completion contents). Entries expire ttl seconds after
+    being stored; expired rows are ignored on read and deleted when the store
+    is pruned, which also drops the oldest rows beyond max_rows.
+    """
+
+    # Writes between prunes, so the DELETE scans run once per batch of writes
+    PRUNE_INTERVAL = 100
+
+    def __init__(self, path: str, ttl: Optional[float] = None, max_rows: int = 20000):
+        self.path = path
+        self.ttl = ttl
+        self.max_rows = max_rows
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # One connection shared by request threads, serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._conn.commit()
+        self._lock = Lock()
+        self._writes_since_prune = 0
+        with self._lock:
+            self._prune()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the stored value, or None on a miss or expired entry."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        return value
+
+    def set(self, key: str, value: str):
+        """Store a value, replacing any earlier entry for the key."""
+        # Wall-clock expiry, since entries outlive the process
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= self.PRUNE_INTERVAL:
+                self._prune()
+            self._conn.commit()
+
+    def _prune(self):
+        """Delete expired rows, then the oldest rows beyond max_rows (lock held)."""
+        self._conn.execute(
+            "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (time.time(),),
+        )
+        # INSERT OR REPLACE gives a rewritten key a new rowid, so rowid order is storage order
+        self._conn.execute(
+            "DELETE FROM responses WHERE rowid <= "
+            "(SELECT rowid FROM responses ORDER BY rowid DESC LIMIT 1 OFFSET ?)",
+            (self.max_rows,),
+        )
+        self._conn.commit()
+        self._writes_since_prune = 0
+
+    def clear(self):
+        """Drop all stored entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+class SemanticCache:
+    """
+    Cache keyed by embedding similarity instead of exact text.
+
+    Entries are namespaced (e.g. by module) so a Container alert never matches
+    a Vessel one, and expire after ttl seconds so diagnoses do not go stale.
+
+    A lookup is a pure-Python scan costing max_per_namespace x dimensions
+    multiplications (about 200k for 128 entries of 1536 floats), so keep
+    max_per_namespace small. The scan runs outside the lock.
+    """
+
+    def __init__(self, threshold: float = 0.92, ttl: int = 3600, max_per_namespace: int = 512):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_per_namespace = max_per_namespace
+        self._entries: Dict[str, List[Dict]] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> Tuple[float, ...]:
+        norm = math.sqrt(sum(value * value for value in embedding)) or 1.0
+        return tuple(value / norm for value in embedding)
+
+    def get(self, namespace: str, embedding: List[float]) -> Optional[Any]:
+        """Return the value of the most similar live entry above the threshold."""
+        query = self._normalize(embedding)
+        now = time.time()
+        best_value, best_score = None, self.threshold
+
+        # Only the expiry sweep holds the lock; the similarity scan runs on a
+        # snapshot so concurrent lookups do not queue behind each other
+        with self._lock:
+            live = [entry for entry in self._entries.get(namespace, []) if entry["expires_at"] > now]
+            self._entries[namespace] = live
+            snapshot = tuple(live)  # set() may append to or trim the live list meanwhile
+
+        for entry in snapshot:
+            # Vectors are normalized on insert, so the dot product is the cosine similarity
+            score = sum(map(operator.mul, query, entry["embedding"]))
+            if score >= best_score:
+                best_value, best_score = entry["value"], score
+
+        return best_value
+
+    def set(self, namespace: str, embedding: List[float], value: Any):
+        """Store a value under its embedding, dropping the oldest entries when full."""
+        normalized = self._normalize(embedding)
+        with self._lock:
+            entries = self._entries.setdefault(namespace, [])
+            entries.append({
+                "embedding": normalized,
+                "value": value,
+                "expires_at": time.time() + self.ttl,
+            })
+            if len(entries) > self.max_per_namespace:
+                del entries[: len(entries) - self.max_per_namespace]
+
+    def clear(self):
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,193 @@
+"""
+JSON schemas for Azure OpenAI structured outputs, and tolerant parsing of
+JSON responses.
+Schemas are passed as response_format so responses always match the shapes
+the analyzer expects. Strict mode requires every property to be listed in
+"required" and additionalProperties to be false.
+"""
+
+import json
+from typing import Dict, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_JSON_DECODER = json.JSONDecoder()
+# orjson parses several times faster when installed; its decode error
+# subclasses json.JSONDecodeError, so either loader is handled the same way
+_loads = orjson.loads if orjson else json.loads
+
+
+def parse_json_object(text: str) -> Optional[Dict]:
+    """
+    Parse a JSON response, salvaging the first complete object if the model
+    wrapped it in prose or markdown fences. Returns None when nothing
+    parseable is found.
+    """
+    if not text:
+        return None
+    try:
+        return _loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    # raw_decode stops at the end of the first complete value, so trailing
+    # text (even text containing braces) does not matter
+    start = text.find("{")
+    while start != -1:
+        try:
+            return _JSON_DECODER.raw_decode(text, start)[0]
+        except json.JSONDecodeError:
+            start = text.find("{", start + 1)
+    return None
+
+
+def json_schema_format(name: str, schema: Dict) -> Dict:
+    """Wrap a schema as a strict chat.completions response_format."""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": schema, "strict": True},
+    }
+
+
+def _object(properties: Dict) -> Dict:
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+_STRING = {"type": "string"}
+_NULLABLE_STRING = {"type": ["string", "null"]}
+_STRING_LIST = {"type": "array", "items": _STRING}
+
+
+PARSED_ALERT_SCHEMA = _object({
+    "ticket_id": _STRING,
+    "channel": {"type": "string", "enum": ["Email", "SMS", "Call"]},
+    "module": {"type": "string", "enum": ["Container", "Vessel", "EDI", "API", "Unknown"]},
+    "priority": {"type": "string", "enum": ["Low", "Medium", "High", "Critical"]},
+    "entity_type": {"type": "string", "enum": ["container", "vessel", "message", "other"]},
+    "entity_id": _STRING,
+    "symptoms": _STRING_LIST,
+    "error_code": _NULLABLE_STRING,
+    "reporter": _STRING,
+})
+
+# parse_alerts_combined: several alerts parsed in one completion, each tagged
+# with its position in the request
+PARSED_ALERT_LIST_SCHEMA = _object({
+    "alerts": {
+        "type": "array",
+        "items": _object({"index": {"type": "integer"}, **PARSED_ALERT_SCHEMA["properties"]}),
+    },
+})
+
+ROOT_CAUSE_SCHEMA = _object({
+    "root_cause": _STRING,
+    "technical_details": _STRING,
+    "confidence": {"type": "integer"},
+    "evidence_summary": _STRING_LIST,
+    "affected_systems": _STRING_LIST,
+})
+
+RESOLUTION_SCHEMA = _object({
+    "resolution_steps": _STRING_LIST,
+    "verification_steps": _STRING_LIST,
+    "sql_queries": _STRING_LIST,
+    "estimated_time": _STRING,
+    "time_breakdown": _object({
+        "resolution_steps_time": _STRING,
+        "verification_steps_time": _STRING,
+        "sql_commands_time": _STRING,
+    }),
+    "escalate": {"type": "boolean"},
+    "escalate_to": _NULLABLE_STRING,
+    "escalate_reason": _STRING,
+})
+
+# analyze_and_resolve: both answers from one completion
+ROOT_CAUSE_RESOLUTION_SCHEMA = _object({
+    "root_cause": ROOT_CAUSE_SCHEMA,
+    "resolution": RESOLUTION_SCHEMA,
+})
+
+ESCALATION_DECISION_SCHEMA = _object({
+    "escalate": {"type": "boolean"},
+    "escalate_to": _NULLABLE_STRING,
+    "escalate_reason": _STRING,
+    "estimated_time": _STRING,
+    "resolution_steps": _STRING_LIST,
+    "verification_steps": _STRING_LIST,
+    "sql_queries": _STRING_LIST,
+    "risk_assessment": {"type": "string", "enum": ["Low", "Medium", "High"]},
+    "confidence_in_decision": {"type": "string", "enum": ["High", "Medium", "Low"]},
+})
+
+# GPTAnalyzerOptimized: the optimized pipeline reports EDI issues under the
+# EDI/API module and team, so the enums leave no room for plain "EDI"
+ESCALATION_TEAMS = ["Container Team", "Vessel Management Team", "EDI/API Team", "Product Team"]
+
+OPTIMIZED_PARSED_SCHEMA = _object({
+    "ticket_id": _STRING,
+    "module": {"type": "string", "enum": ["Container", "Vessel", "EDI/API", "Unknown"]},
+    "entity_id": _STRING,
+    "channel": {"type": "string", "enum": ["Email", "SMS", "Call"]},
+    "priority": {"type": "string", "enum": ["High", "Medium", "Low"]},
+    "symptoms": _STRING_LIST,
+    "error_code": _NULLABLE_STRING,
+})
+
+OPTIMIZED_ROOT_CAUSE_SCHEMA = _object({
+    "root_cause": _STRING,
+    "technical_details": _STRING,
+    "confidence": {"type": "integer"},
+    "evidence_summary": _STRING_LIST,
+})
+
+OPTIMIZED_RESOLUTION_SCHEMA = _object({
+    **RESOLUTION_SCHEMA["properties"],
+    "escalate_to": {"type": ["string", "null"], "enum": ESCALATION_TEAMS + [None]},
+})
+
+# analyze_alert_and_root_cause
+ANALYSIS_SCHEMA = _object({
+    "parsed": OPTIMIZED_PARSED_SCHEMA,
+    "root_cause": OPTIMIZED_ROOT_CAUSE_SCHEMA,
+})
+
+# generate_resolution_and_decision
+RESOLUTION_RESULT_SCHEMA = _object({
+    "resolution": OPTIMIZED_RESOLUTION_SCHEMA,
+})
+
+# analyze_full: all three sections from one completion
+FULL_ANALYSIS_SCHEMA = _object({
+    **ANALYSIS_SCHEMA["properties"],
+    **RESOLUTION_RESULT_SCHEMA["properties"],
+})
+
+# analyze_alerts_batch: one full analysis per alert, tagged with its number
+FULL_ANALYSIS_LIST_SCHEMA = _object({
+    "alerts": {
+        "type": "array",
+        "items": _object({"index": {"type": "integer"}, **FULL_ANALYSIS_SCHEMA["properties"]}),
+    },
+})
+
+
+PARSED_ALERT_FORMAT = json_schema_format("parsed_alert", PARSED_ALERT_SCHEMA)
+PARSED_ALERT_LIST_FORMAT = json_schema_format("parsed_alert_list", PARSED_ALERT_LIST_SCHEMA)
+ROOT_CAUSE_FORMAT = json_schema_format("root_cause", ROOT_CAUSE_SCHEMA)
+RESOLUTION_FORMAT = json_schema_format("resolution", RESOLUTION_SCHEMA)
+ROOT_CAUSE_RESOLUTION_FORMAT = json_schema_format("root_cause_resolution", ROOT_CAUSE_RESOLUTION_SCHEMA)
+ESCALATION_DECISION_FORMAT = json_schema_format("escalation_decision", ESCALATION_DECISION_SCHEMA)
+ANALYSIS_FORMAT = json_schema_format("analysis", ANALYSIS_SCHEMA)
+RESOLUTION_RESULT_FORMAT = json_schema_format("resolution_result", RESOLUTION_RESULT_SCHEMA)
+FULL_ANALYSIS_FORMAT = json_schema_format("full_analysis", FULL_ANALYSIS_SCHEMA)
+FULL_ANALYSIS_LIST_FORMAT = json_schema_format("full_analysis_list", FULL_ANALYSIS_LIST_SCHEMA)
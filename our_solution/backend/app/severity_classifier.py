@@ -10,6 +10,20 @@ from typing import Dict, List, Optional
 class SeverityClassifier:
     """Classify incident severity using rule-based baseline + GPT refinement."""
     
+    # Task for _gpt_refine_severity, appended to the analyzer's SYSTEM_PREAMBLE
+    REFINE_TASK_PROMPT = """
+TASK: You are an incident severity classifier.
+Your job is to determine if the current severity classification should be adjusted based on context.
+
+Consider:
+- The specific error and its business impact
+- Customer urgency indicators
+- System criticality
+- Transaction context
+
+Respond with ONLY: "Low", "Medium", "High", or "Critical"
+"""
+    
     def __init__(self):
         """Initialize severity classification rules."""
         
@@ -151,37 +165,29 @@ class SeverityClassifier:
     ) -> str:
         """Use GPT to refine severity classification for contextual cases."""
         
-        system_prompt = """You are an incident severity classifier. 
-        Your job is to determine if the current severity classification should be adjusted based on context.
-        
-        Consider:
-        - The specific error and its business impact
-        - Customer urgency indicators
-        - System criticality
-        - Transaction context
-        
-        Respond with ONLY: "Low", "Medium", "High", or "Critical"
-        """
+        # Shared preamble first, then the static task, like the analyzer's own prompts
+        system_prompt = gpt_analyzer.SYSTEM_PREAMBLE + self.REFINE_TASK_PROMPT
         
         user_prompt = f"""Current severity classification: {current_severity}
-        
-        Alert details:
-        - Error code: {parsed_alert.get('error_code', 'None')}
-        - Module: {parsed_alert.get('module', 'None')}
-        - Entity: {parsed_alert.get('entity_id', 'None')}
-        - Alert text: {parsed_alert.get('alert_text', '')[:200]}...
-        
-        Impact assessment:
-        - Impact score: {impact_assessment.get('impact_score', 0)}
-        - Severity: {impact_assessment.get('severity', 'Unknown')}
-        
-        Based on this context, should the severity be adjusted?
-        Consider if this is a routine issue, service degradation, or critical failure.
-        
-        Respond with the appropriate severity level:"""
+
+Alert details:
+- Error code: {parsed_alert.get('error_code', 'None')}
+- Module: {parsed_alert.get('module', 'None')}
+- Entity: {parsed_alert.get('entity_id', 'None')}
+- Alert text: {parsed_alert.get('alert_text', '')[:200]}...
+
+Impact assessment:
+- Impact score: {impact_assessment.get('impact_score', 0)}
+- Severity: {impact_assessment.get('severity', 'Unknown')}
+
+Based on this context, should the severity be adjusted?
+Consider if this is a routine issue, service degradation, or critical failure.
+
+Respond with the appropriate severity level:"""
         
         try:
-            response = gpt_analyzer._call_gpt(system_prompt, user_prompt, temperature=0.1)
+            # The answer is a single severity word
+            response = gpt_analyzer._call_gpt(system_prompt, user_prompt, temperature=0.1, max_tokens=10)
             refined_severity = response.strip()
             
             # Validate response
@@ -11,6 +11,7 @@ from __future__ import annotations
 
 import argparse
 import os
+from threading import Lock
 from typing import Optional
 
 from flask import Flask, jsonify, request
@@ -26,6 +27,7 @@ app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
 _system: Optional[L2DiagnosticSystemOptimized] = None
+_system_lock = Lock()
 
 
 def get_system() -> L2DiagnosticSystemOptimized:
@@ -37,8 +39,11 @@ def get_system() -> L2DiagnosticSystemOptimized:
             "Set AZURE_OPENAI_API_KEY in your environment or .env file."
         )
 
-    if _system is None:
-        _system = L2DiagnosticSystemOptimized()
+    # Flask serves requests on threads; the lock stops concurrent first
+    # requests from each building their own system and client
+    with _system_lock:
+        if _system is None:
+            _system = L2DiagnosticSystemOptimized()
     return _system
 
 